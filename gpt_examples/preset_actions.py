@@ -2,219 +2,101 @@
 from time import sleep
 import random
 from math import sin, cos, pi
+from picarx import play_frames
+
+# Actions are lists of (commands, hold time(s)) frames, see Picarx.compile_action() for the commands.
+# Picarx objects with play_action() compile each action once into a timeline
+# of register writes and replay it, others run the frames through the setters.
+
+def _repeat(frames, times):
+    return frames * times
+
+action_frames = {
+    "wave hands": [({'reset': None, 'tilt': 20}, 0)]
+        + _repeat([({'dir': -25}, .1), ({'dir': 25}, .1)], 2)
+        + [({'dir': 0}, 0)],
+    "resist": [({'reset': None, 'tilt': 10}, 0)]
+        + _repeat([({'dir': -15, 'pan': 15}, .1), ({'dir': 15, 'pan': -15}, .1)], 3)
+        + [({'stop': None, 'dir': 0, 'pan': 0}, 0)],
+    "act cute": [({'reset': None, 'tilt': -20}, 0)]
+        + _repeat([({'forward': 5}, .02), ({'backward': 5}, .02)], 15)
+        + [({'tilt': 0, 'stop': None}, 0)],
+    "rub hands": [({'reset': None}, 0)]
+        + _repeat([({'dir': -6}, .5), ({'dir': 6}, .5)], 5)
+        + [({'reset': None}, 0)],
+    "think": [({'reset': None}, 0)]
+        + [({'pan': i*3, 'tilt': -i*2, 'dir': i*2}, .05) for i in range(11)]
+        + [({}, 1),
+           ({'pan': 15, 'tilt': -10, 'dir': 10}, .1),
+           ({'reset': None}, 0)],
+    "keep think": [({'reset': None}, 0)]
+        + [({'pan': i*3, 'tilt': -i*2, 'dir': i*2}, .05) for i in range(11)],
+    "shake head": [({'stop': None, 'pan': 60}, .2)]
+        + [({'pan': angle}, .1) for angle in (-50, 40, -30, 20, -10, 10, -5)]
+        + [({'pan': 0}, 0)],
+    "nod": [({'reset': None, 'tilt': 5}, .1),
+            ({'tilt': -30}, .1),
+            ({'tilt': 5}, .1),
+            ({'tilt': -30}, .1),
+            ({'tilt': 0}, 0)],
+    "depressed": [({'reset': None, 'tilt': 20}, .22)]
+        + [({'tilt': angle}, .1) for angle in (-22, 10, -22, 0, -22, -10, -22, -15, -22, -19)]
+        + [({'tilt': -22}, .1 + 1.5),
+           ({'reset': None}, 0)],
+    "twist body": [({'reset': None}, 0)]
+        + _repeat([({'motors': (20, 20), 'pan': -20, 'dir': -10}, .1),
+                   ({'motors': (0, 0), 'pan': 0, 'dir': 0}, .1),
+                   ({'motors': (-20, -20), 'pan': 20, 'dir': 10}, .1),
+                   ({'motors': (0, 0), 'pan': 0, 'dir': 0}, .1)], 3),
+    "celebrate": [({'reset': None, 'tilt': 20}, 0),
+                  ({'dir': 30, 'pan': 60}, .3),
+                  ({'dir': 10, 'pan': 30}, .1),
+                  ({'dir': 30, 'pan': 60}, .3),
+                  ({'dir': 0, 'pan': 0}, .2),
+                  ({'dir': -30, 'pan': -60}, .3),
+                  ({'dir': -10, 'pan': -30}, .1),
+                  ({'dir': -30, 'pan': -60}, .3),
+                  ({'dir': 0, 'pan': 0}, .2)],
+}
+
+def play(car, name, speed=1.0):
+    if hasattr(car, 'play_action'):
+        car.play_action(name, action_frames[name], speed)
+    else:
+        play_frames(car, action_frames[name], speed)
 
 def wave_hands(car):
-    car.reset()
-    car.set_cam_tilt_angle(20)
-    for _ in range(2):
-        car.set_dir_servo_angle(-25)
-        sleep(.1)
-        # car.set_dir_servo_angle(0)
-        # sleep(.1)
-        car.set_dir_servo_angle(25)
-        sleep(.1)
-    car.set_dir_servo_angle(0)
+    play(car, "wave hands")
 
 def resist(car):
-    car.reset()
-    car.set_cam_tilt_angle(10)
-    for _ in range(3):
-        car.set_dir_servo_angle(-15)
-        car.set_cam_pan_angle(15)
-        sleep(.1)
-        car.set_dir_servo_angle(15)
-        car.set_cam_pan_angle(-15)
-        sleep(.1)
-    car.stop()
-    car.set_dir_servo_angle(0)
-    car.set_cam_pan_angle(0)
+    play(car, "resist")
 
 def act_cute(car):
-    car.reset()
-    car.set_cam_tilt_angle(-20)
-    for i in range(15):
-        car.forward(5)
-        sleep(0.02)
-        car.backward(5)
-        sleep(0.02)
-    car.set_cam_tilt_angle(0)
-    car.stop()
+    play(car, "act cute")
 
 def rub_hands(car):
-    car.reset()
-    for i in range(5):
-        car.set_dir_servo_angle(-6)
-        sleep(.5)
-        car.set_dir_servo_angle(6)
-        sleep(.5)
-    car.reset()
+    play(car, "rub hands")
 
 def think(car):
-    car.reset()
-
-    for i in range(11):
-        car.set_cam_pan_angle(i*3)
-        car.set_cam_tilt_angle(-i*2)
-        car.set_dir_servo_angle(i*2)
-        sleep(.05)
-    sleep(1)
-    car.set_cam_pan_angle(15)
-    car.set_cam_tilt_angle(-10)
-    car.set_dir_servo_angle(10)
-    sleep(.1)
-    car.reset()
+    play(car, "think")
 
 def keep_think(car):
-    car.reset()
-    for i in range(11):
-        car.set_cam_pan_angle(i*3)
-        car.set_cam_tilt_angle(-i*2)
-        car.set_dir_servo_angle(i*2)
-        sleep(.05)
+    play(car, "keep think")
 
 def shake_head(car):
-    car.stop()
-    car.set_cam_pan_angle(0)
-    car.set_cam_pan_angle(60)
-    sleep(.2)
-    car.set_cam_pan_angle(-50)
-    sleep(.1)
-    car.set_cam_pan_angle(40)
-    sleep(.1)
-    car.set_cam_pan_angle(-30)
-    sleep(.1)
-    car.set_cam_pan_angle(20)
-    sleep(.1)
-    car.set_cam_pan_angle(-10)
-    sleep(.1)
-    car.set_cam_pan_angle(10)
-    sleep(.1)
-    car.set_cam_pan_angle(-5)
-    sleep(.1)
-    car.set_cam_pan_angle(0)
+    play(car, "shake head")
 
 def nod(car):
-    car.reset()
-    car.set_cam_tilt_angle(0)
-    car.set_cam_tilt_angle(5)
-    sleep(.1)
-    car.set_cam_tilt_angle(-30)
-    sleep(.1)
-    car.set_cam_tilt_angle(5)
-    sleep(.1)
-    car.set_cam_tilt_angle(-30)
-    sleep(.1)
-    car.set_cam_tilt_angle(0)
-
+    play(car, "nod")
 
 def depressed(car):
-    # car.reset()
-    # car.set_cam_tilt_angle(0)
-    # car.set_cam_tilt_angle(20)
-    # sleep(.22)
-    # car.set_cam_tilt_angle(-30)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(15)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(-20)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(10)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(-10)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(5)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(-5)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(2)
-    # sleep(.1)
-    # car.set_cam_tilt_angle(0)
-
-    car.reset()
-    car.set_cam_tilt_angle(0)
-    car.set_cam_tilt_angle(20)
-    sleep(.22)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-    car.set_cam_tilt_angle(10)
-    sleep(.1)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-    car.set_cam_tilt_angle(0)
-    sleep(.1)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-    car.set_cam_tilt_angle(-10)
-    sleep(.1)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-    car.set_cam_tilt_angle(-15)
-    sleep(.1)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-    car.set_cam_tilt_angle(-19)
-    sleep(.1)
-    car.set_cam_tilt_angle(-22)
-    sleep(.1)
-
-    sleep(1.5)
-    car.reset()
+    play(car, "depressed")
 
 def twist_body(car):
-    car.reset()
-    for i in range(3):
-        car.set_motor_speed(1, 20)
-        car.set_motor_speed(2, 20)
-        car.set_cam_pan_angle(-20)
-        car.set_dir_servo_angle(-10)
-        sleep(.1)
-        car.set_motor_speed(1, 0)
-        car.set_motor_speed(2, 0)
-        car.set_cam_pan_angle(0)
-        car.set_dir_servo_angle(0)
-        sleep(.1)
-        car.set_motor_speed(1, -20)
-        car.set_motor_speed(2, -20)
-        car.set_cam_pan_angle(20)
-        car.set_dir_servo_angle(10)
-        sleep(.1)
-        car.set_motor_speed(1, 0)
-        car.set_motor_speed(2, 0)
-        car.set_cam_pan_angle(0)
-        car.set_dir_servo_angle(0)
-
-        sleep(.1)
-
+    play(car, "twist body")
 
 def celebrate(car):
-    car.reset()
-    car.set_cam_tilt_angle(20)
-
-    car.set_dir_servo_angle(30)
-    car.set_cam_pan_angle(60)
-    sleep(.3)
-    car.set_dir_servo_angle(10)
-    car.set_cam_pan_angle(30)
-    sleep(.1)
-    car.set_dir_servo_angle(30)
-    car.set_cam_pan_angle(60)
-    sleep(.3)
-    car.set_dir_servo_angle(0)
-    car.set_cam_pan_angle(0)
-    sleep(.2)
-
-    car.set_dir_servo_angle(-30)
-    car.set_cam_pan_angle(-60)
-    sleep(.3)
-    car.set_dir_servo_angle(-10)
-    car.set_cam_pan_angle(-30)
-    sleep(.1)
-    car.set_dir_servo_angle(-30)
-    car.set_cam_pan_angle(-60)
-    sleep(.3)
-    car.set_dir_servo_angle(0)
-    car.set_cam_pan_angle(0)
-    sleep(.2)
+    play(car, "celebrate")
 
 def honking(music):
     import utils
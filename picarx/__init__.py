@@ -1,3 +1,28 @@
 #!/usr/bin/env python3
-from .picarx import Picarx
+import importlib
+try:
+    from .picarx import Picarx
+except ImportError:
+    # robot_hat is not installed, run on the simulated hardware
+    from .picarx_improved import Picarx
+from .control_loop import ControlLoop
 from .version import __version__
+
+# loaded on first use, so import picarx does not pull in asyncio
+_LAZY = {
+    'AsyncPicarx': '.async_picarx',
+    'play_frames': '.picarx_improved',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
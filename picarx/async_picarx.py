@@ -0,0 +1,117 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from .picarx_improved import Picarx
+
+
+class AsyncPicarx(object):
+    '''
+    Asyncio facade of Picarx
+
+    I2C work (motors, servos, grayscale) runs on one dedicated worker
+    thread, so bus transactions stay in order, and ultrasonic ranging,
+    which busy waits on a gpio, runs on its own worker so it never
+    delays drive commands. Use from a coroutine:
+
+        async with AsyncPicarx() as px:
+            await px.forward(30)
+            distance = await px.get_distance()
+    '''
+
+    def __init__(self, px=None, executor=None, **kwargs):
+        '''
+        param px: Picarx to wrap, None to create one with kwargs
+        type px: Picarx
+        param executor: executor of I2C work, None for a dedicated thread
+        type executor: concurrent.futures.Executor
+        '''
+        if px is None:
+            px = Picarx(**kwargs)
+        self.px = px
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='picarx-i2c')
+        self._executor = executor
+        self._ranging_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='picarx-ranging')
+
+    @classmethod
+    async def create(cls, executor=None, **kwargs):
+        ''' create the Picarx on the I2C worker, without blocking the event loop '''
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='picarx-i2c')
+        loop = asyncio.get_running_loop()
+        px = await loop.run_in_executor(executor, functools.partial(Picarx, **kwargs))
+        self = cls(px, executor)
+        # close() shuts the executor down only if it was made here
+        self._own_executor = own_executor
+        return self
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def forward(self, speed):
+        await self._run(self.px.forward, speed)
+
+    async def backward(self, speed):
+        await self._run(self.px.backward, speed)
+
+    async def drive(self, speed, steer):
+        return await self._run(self.px.drive, speed, steer)
+
+    async def set_power(self, speed):
+        await self._run(self.px.set_power, speed)
+
+    async def set_motor_speed(self, motor, speed):
+        await self._run(self.px.set_motor_speed, motor, speed)
+
+    async def set_dir_servo_angle(self, value):
+        await self._run(self.px.set_dir_servo_angle, value)
+
+    async def set_cam_pan_angle(self, value):
+        await self._run(self.px.set_cam_pan_angle, value)
+
+    async def set_cam_tilt_angle(self, value):
+        await self._run(self.px.set_cam_tilt_angle, value)
+
+    async def stop(self):
+        '''
+        Execute twice to make sure it stops, waiting in between without blocking
+        '''
+        for _ in range(2):
+            await self._run(self.px._stop_motors)
+            await asyncio.sleep(0.002)
+
+    async def reset(self):
+        await self.stop()
+        await self._run(self.px.set_dir_servo_angle, 0)
+        await self._run(self.px.set_cam_tilt_angle, 0)
+        await self._run(self.px.set_cam_pan_angle, 0)
+
+    async def get_distance(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._ranging_executor, self.px.get_distance)
+
+    async def get_grayscale_data(self):
+        return await self._run(self.px.get_grayscale_data)
+
+    def get_line_status(self, gm_val_list):
+        return self.px.get_line_status(gm_val_list)
+
+    def get_cliff_status(self, gm_val_list):
+        return self.px.get_cliff_status(gm_val_list)
+
+    def close(self):
+        ''' shut down the worker threads '''
+        self._ranging_executor.shutdown(wait=True)
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        self.close()
+        return False
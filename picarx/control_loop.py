@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+class ControlLoop(object):
+    '''
+    Fixed rate sense -> decide -> act loop
+
+    Every iteration is scheduled at an absolute deadline on the monotonic
+    clock, so the rate does not drift with the time the callbacks take.
+    An iteration that runs past the next deadline is an overrun, the next
+    one then starts at once, and whole missed periods are skipped instead
+    of being run back to back.
+
+        loop = ControlLoop(50,
+                           sense=px.get_grayscale_data,
+                           decide=px.get_line_status,
+                           act=steer)
+        loop.run(duration=10)
+        print(loop.report())
+    '''
+
+    HIST_EDGES_US = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000]
+    ''' upper edges of the histogram bins in microseconds, the last bin is open '''
+
+    def __init__(self, rate, sense=None, decide=None, act=None,
+                 realtime=False, priority=10, cpus=None):
+        '''
+        param rate: iterations per second
+        type rate: float
+        param sense: called first, takes no argument, its result is passed to decide
+        type sense: callable
+        param decide: called with the result of sense, its result is passed to act
+        type decide: callable
+        param act: called with the result of decide
+        type act: callable
+        param realtime: run the loop thread with SCHED_FIFO, Linux only and needs root or CAP_SYS_NICE
+        type realtime: bool
+        param priority: SCHED_FIFO priority, 1-99
+        type priority: int
+        param cpus: cpus to pin the loop thread to, None to keep the default affinity
+        type cpus: list
+        '''
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.sense = sense
+        self.decide = decide
+        self.act = act
+        self.realtime = realtime
+        self.priority = priority
+        self.cpus = cpus
+        self._running = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        ''' clear iteration count and histograms '''
+        self.iterations = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_jitter = 0.0
+        self.max_overrun = 0.0
+        self.jitter_hist = [0] * (len(self.HIST_EDGES_US) + 1)
+        self.overrun_hist = [0] * (len(self.HIST_EDGES_US) + 1)
+
+    def _bin(self, seconds):
+        return bisect_left(self.HIST_EDGES_US, seconds * 1000000)
+
+    def _setup_thread(self):
+        # pid 0 is the calling thread on Linux
+        if self.cpus is not None:
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except (AttributeError, OSError) as e:
+                print(f"ControlLoop: cpu affinity not set: {e}")
+        if self.realtime:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            except (AttributeError, OSError) as e:
+                print(f"ControlLoop: SCHED_FIFO not set: {e}")
+
+    def step(self):
+        ''' run sense -> decide -> act once '''
+        data = self.sense() if self.sense is not None else None
+        if self.decide is not None:
+            data = self.decide(data) if self.sense is not None else self.decide()
+        if self.act is not None:
+            self.act(data)
+
+    def run(self, duration=None, iterations=None):
+        '''
+        run the loop in the calling thread, until stop(), duration or iterations
+
+        param duration: seconds to run, None for no limit
+        type duration: float
+        param iterations: iterations to run, None for no limit
+        type iterations: int
+        '''
+        self._setup_thread()
+        self._stop_event.clear()
+        self._running = True
+        start = time.monotonic()
+        end = None if duration is None else start + duration
+        count = 0
+        deadline = start
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                jitter = now - deadline
+                self.jitter_hist[self._bin(jitter)] += 1
+                self.max_jitter = max(self.max_jitter, jitter)
+
+                self.step()
+                self.iterations += 1
+                count += 1
+                if iterations is not None and count >= iterations:
+                    break
+
+                deadline += self.period
+                now = time.monotonic()
+                if end is not None and deadline >= end:
+                    break
+                late = now - deadline
+                if late > 0:
+                    self.overruns += 1
+                    self.overrun_hist[self._bin(late)] += 1
+                    self.max_overrun = max(self.max_overrun, late)
+                    # a late iteration runs at once, only whole missed periods are skipped
+                    missed = int(late // self.period)
+                    self.skipped += missed
+                    deadline += missed * self.period
+                    late -= missed * self.period
+                # Waiting on the event lets stop() wake the loop at once
+                self._stop_event.wait(max(0.0, -late))
+        finally:
+            self._running = False
+
+    def start(self, duration=None, iterations=None):
+        ''' run the loop in a background thread '''
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, args=(duration, iterations),
+                                        name='ControlLoop', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        ''' stop the loop and wait for the current iteration to finish '''
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self):
+        return self._running
+
+    def stats(self):
+        '''
+        return: dict of iteration count, overruns, skipped periods, max jitter and
+                max overrun in seconds, and the jitter/overrun histograms
+        '''
+        labels = [f"<={edge}us" for edge in self.HIST_EDGES_US]
+        labels.append(f">{self.HIST_EDGES_US[-1]}us")
+        return {
+            'rate': self.rate,
+            'iterations': self.iterations,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'max_jitter': self.max_jitter,
+            'max_overrun': self.max_overrun,
+            'jitter_hist': dict(zip(labels, self.jitter_hist)),
+            'overrun_hist': dict(zip(labels, self.overrun_hist)),
+        }
+
+    def report(self):
+        ''' return: stats() as readable text '''
+        stats = self.stats()
+        lines = [f"{stats['iterations']} iterations at {self.rate} Hz, "
+                 f"{stats['overruns']} overruns, {stats['skipped']} skipped periods, "
+                 f"max jitter {stats['max_jitter'] * 1000000:.0f}us, "
+                 f"max overrun {stats['max_overrun'] * 1000000:.0f}us"]
+        for name in ('jitter_hist', 'overrun_hist'):
+            lines.append(f"{name[:-5]}:")
+            for label, count in stats[name].items():
+                if count:
+                    lines.append(f"  {label:>9} {count}")
+        return '\n'.join(lines)
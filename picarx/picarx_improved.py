@@ -1,20 +1,29 @@
 #
 import time
+_import_start = time.perf_counter()
 import os
+import sys
+import threading
+from collections import OrderedDict
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..")))
 try:
     from robot_hat import Pin, ADC, PWM, Servo, fileDB
     from robot_hat import Grayscale_Module, Ultrasonic, utils
     on_the_robot = True
     
 except ImportError:
-    import sys
-    sys.path.append(os.path.abspath(os.path.join(
-        os.path.dirname(__file__), "..")))
     from sim_robot_hat import Pin, ADC, PWM, Servo, fileDB
     from sim_robot_hat import Grayscale_Module, Ultrasonic, utils
     on_the_robot = False
+# helpers of this repo, robot_hat does not have them, they also work with robot_hat devices
+from sim_robot_hat import RangingService, hysteresis_mask, mask_transitions, Timeline, PowerUpScheduler
+# batched writes and servo lookup tables are sim_robot_hat additions,
+# with a stock robot_hat the per channel calls are used instead
+_batched_io = hasattr(PWM, 'write_many')
+_servo_lut = hasattr(Servo, 'fast_angle')
 
-
+_import_time = time.perf_counter() - _import_start
 
 
 def constrain(x, min_val, max_val):
@@ -23,6 +32,46 @@ def constrain(x, min_val, max_val):
     '''
     return max(min_val, min(max_val, x))
 
+def play_frames(car, frames, speed=1.0):
+    '''
+    Play action frames through the setters of a car, without compiling them,
+    for cars without Picarx.play_action() or batched writes
+
+    param car: car to move, any Picarx
+    type car: Picarx
+    param frames: list of (commands, hold time(s)), see Picarx.compile_action()
+    type frames: list
+    param speed: playback speed, hold times are divided by it
+    type speed: float
+    '''
+    start = time.monotonic()
+    at = 0.0
+    for commands, hold in frames:
+        for command, value in commands.items():
+            if command == 'reset':
+                car.reset()
+            elif command == 'stop':
+                car.stop()
+            elif command == 'dir':
+                car.set_dir_servo_angle(value)
+            elif command == 'pan':
+                car.set_cam_pan_angle(value)
+            elif command == 'tilt':
+                car.set_cam_tilt_angle(value)
+            elif command == 'motors':
+                car.set_motor_speed(1, value[0])
+                car.set_motor_speed(2, value[1])
+            elif command == 'forward':
+                car.forward(value)
+            elif command == 'backward':
+                car.backward(value)
+            else:
+                raise ValueError(f"Unknown action command: {command}")
+        at += hold / speed
+        delay = start + at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
 class Picarx(object):
     CONFIG = '/opt/picar-x/picar-x.conf'
 
@@ -40,26 +89,47 @@ class Picarx(object):
     PRESCALER = 10
     TIMEOUT = 0.02
 
+    ACTION_CACHE_SIZE = 32
+    RANGING_MAX_AGE = 3
+
+    SUBSYSTEMS = ('servos', 'motors', 'grayscale', 'ultrasonic')
+    _LAZY_ATTRS = {
+        'cam_pan': 'servos', 'cam_tilt': 'servos', 'dir_servo_pin': 'servos',
+        'left_rear_dir_pin': 'motors', 'right_rear_dir_pin': 'motors',
+        'left_rear_pwm_pin': 'motors', 'right_rear_pwm_pin': 'motors',
+        'motor_direction_pins': 'motors', 'motor_speed_pins': 'motors',
+        'grayscale': 'grayscale',
+        'ultrasonic': 'ultrasonic',
+    }
+
     # servo_pins: camera_pan_servo, camera_tilt_servo, direction_servo
     # motor_pins: left_swicth, right_swicth, left_pwm, right_pwm
     # grayscale_pins: 3 adc channels
     # ultrasonic_pins: trig, echo2
     # config: path of config file
+    # power_up: servo power-up scheduler, default PowerUpScheduler() for the battery supply
+    # lazy: build each subsystem on first use instead of here, see warmup()
     def __init__(self, 
                 servo_pins:list=['P0', 'P1', 'P2'], 
                 motor_pins:list=['D4', 'D5', 'P13', 'P12'],
                 grayscale_pins:list=['A0', 'A1', 'A2'],
                 ultrasonic_pins:list=['D2','D3'],
                 config:str=CONFIG,
+                power_up=None,
+                lazy=False,
                 ):
+        self.startup_times = OrderedDict()
+        self._init_lock = threading.RLock()
+        start = time.perf_counter()
 
         # reset robot_hat
         if on_the_robot:
             utils.reset_mcu()  # Only reset MCU when on the robot
+            time.sleep(0.2)  # wait for the MCU to boot
         else:
             print("Simulated environment: MCU reset skipped.")
-        # utils.reset_mcu()
-        time.sleep(0.2)
+        self.startup_times['reset_mcu'] = time.perf_counter() - start
+        start = time.perf_counter()
 
         # --------- config_flie ---------
         # self.config_flie = fileDB(config, 777, os.getlogin())\
@@ -68,75 +138,198 @@ class Picarx(object):
         else:
             self.config_flie = fileDB(config)
 
-        # --------- servos init ---------
-        self.cam_pan = Servo(servo_pins[0])
-        self.cam_tilt = Servo(servo_pins[1])   
-        self.dir_servo_pin = Servo(servo_pins[2])
         # get calibration values
         self.dir_cali_val = float(self.config_flie.get("picarx_dir_servo", default_value=0))
         self.cam_pan_cali_val = float(self.config_flie.get("picarx_cam_pan_servo", default_value=0))
         self.cam_tilt_cali_val = float(self.config_flie.get("picarx_cam_tilt_servo", default_value=0))
-        # set servos to init angle
-        self.dir_servo_pin.angle(self.dir_cali_val)
-        self.cam_pan.angle(self.cam_pan_cali_val)
-        self.cam_tilt.angle(self.cam_tilt_cali_val)
-
-        # --------- motors init ---------
-        self.left_rear_dir_pin = Pin(motor_pins[0])
-        self.right_rear_dir_pin = Pin(motor_pins[1])
-        self.left_rear_pwm_pin = PWM(motor_pins[2])
-        self.right_rear_pwm_pin = PWM(motor_pins[3])
-        self.motor_direction_pins = [self.left_rear_dir_pin, self.right_rear_dir_pin]
-        self.motor_speed_pins = [self.left_rear_pwm_pin, self.right_rear_pwm_pin]
-        # get calibration values
         self.cali_dir_value = self.config_flie.get("picarx_dir_motor", default_value="[1, 1]")
         self.cali_dir_value = [int(i.strip()) for i in self.cali_dir_value.strip().strip("[]").split(",")]
         self.cali_speed_value = [0, 0]
         self.dir_current_angle = 0
+        self._motor_levels = [None, None]
+        # get reference
+        self.line_reference = self.config_flie.get("line_reference", default_value=str(self.DEFAULT_LINE_REF))
+        self.line_reference = [float(i) for i in self.line_reference.strip().strip('[]').split(',')]
+        self.cliff_reference = self.config_flie.get("cliff_reference", default_value=str(self.DEFAULT_CLIFF_REF))
+        self.cliff_reference = [float(i) for i in self.cliff_reference.strip().strip('[]').split(',')]
+        self.startup_times['config'] = time.perf_counter() - start
+
+        self._pins = {
+            'servos': servo_pins,
+            'motors': motor_pins,
+            'grayscale': grayscale_pins,
+            'ultrasonic': ultrasonic_pins,
+        }
+        if power_up is None:
+            power_up = PowerUpScheduler()
+        self.power_up = power_up
+        self.ranging = None
+        self._actions = OrderedDict()
+        if not lazy:
+            for name in self.SUBSYSTEMS:
+                self._init_subsystem(name)
+
+    def __getattr__(self, name):
+        # only called for missing attributes, build the subsystem that provides it
+        subsystem = Picarx._LAZY_ATTRS.get(name)
+        if subsystem is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._init_subsystem(subsystem)
+        return self.__dict__[name]
+
+    def _init_subsystem(self, name):
+        with self._init_lock:
+            if name in self.startup_times:
+                return
+            start = time.perf_counter()
+            getattr(self, f'_init_{name}')(self._pins[name])
+            self.startup_times[name] = time.perf_counter() - start
+
+    def _init_servos(self, servo_pins):
+        # --------- servos init ---------
+        cam_pan = Servo(servo_pins[0])
+        cam_tilt = Servo(servo_pins[1])
+        dir_servo_pin = Servo(servo_pins[2])
+        # set servos to init angle
+        self.power_up.run([dir_servo_pin, cam_pan, cam_tilt],
+                          [self.dir_cali_val, self.cam_pan_cali_val, self.cam_tilt_cali_val])
+        self.cam_pan, self.cam_tilt, self.dir_servo_pin = cam_pan, cam_tilt, dir_servo_pin
+
+    def _init_motors(self, motor_pins):
+        # --------- motors init ---------
+        left_rear_pwm_pin = PWM(motor_pins[2])
+        right_rear_pwm_pin = PWM(motor_pins[3])
         # init pwm
-        for pin in self.motor_speed_pins:
+        for pin in (left_rear_pwm_pin, right_rear_pwm_pin):
             pin.period(self.PERIOD)
             pin.prescaler(self.PRESCALER)
+        self.left_rear_dir_pin = Pin(motor_pins[0])
+        self.right_rear_dir_pin = Pin(motor_pins[1])
+        self.left_rear_pwm_pin = left_rear_pwm_pin
+        self.right_rear_pwm_pin = right_rear_pwm_pin
+        self.motor_direction_pins = [self.left_rear_dir_pin, self.right_rear_dir_pin]
+        self.motor_speed_pins = [self.left_rear_pwm_pin, self.right_rear_pwm_pin]
 
+    def _init_grayscale(self, grayscale_pins):
         # --------- grayscale module init ---------
         adc0, adc1, adc2 = [ADC(pin) for pin in grayscale_pins]
-        self.grayscale = Grayscale_Module(adc0, adc1, adc2, reference=None)
-        # get reference
-        self.line_reference = self.config_flie.get("line_reference", default_value=str(self.DEFAULT_LINE_REF))
-        self.line_reference = [float(i) for i in self.line_reference.strip().strip('[]').split(',')]
-        self.cliff_reference = self.config_flie.get("cliff_reference", default_value=str(self.DEFAULT_CLIFF_REF))
-        self.cliff_reference = [float(i) for i in self.cliff_reference.strip().strip('[]').split(',')]
+        grayscale = Grayscale_Module(adc0, adc1, adc2, reference=None)
         # transfer reference
-        self.grayscale.reference(self.line_reference)
+        grayscale.reference(self.line_reference)
+        self.grayscale = grayscale
 
+    def _init_ultrasonic(self, ultrasonic_pins):
         # --------- ultrasonic init ---------
         trig, echo= ultrasonic_pins
         self.ultrasonic = Ultrasonic(Pin(trig), Pin(echo, mode=Pin.IN, pull=Pin.PULL_DOWN))
-        
-    def set_motor_speed(self, motor, speed):
-        ''' set motor speed
-        
-        param motor: motor index, 1 means left motor, 2 means right motor
+
+    def warmup(self, *subsystems):
+        ''' build subsystems now instead of on first use, and precompute the
+        servo lookup tables, for callers that can not take the first use latency
+
+        param subsystems: names from SUBSYSTEMS, none for all
+        type subsystems: str
+        return: startup_times
+        '''
+        for name in subsystems or self.SUBSYSTEMS:
+            if name not in self.SUBSYSTEMS:
+                raise ValueError(f"Unknown subsystem: {name}, use one of {self.SUBSYSTEMS}")
+            self._init_subsystem(name)
+        if _servo_lut and 'servos' in self.startup_times and 'servo_lut' not in self.startup_times:
+            start = time.perf_counter()
+            self.dir_servo_pin.build_lut(self.dir_cali_val)
+            self.cam_pan.build_lut(-1*self.cam_pan_cali_val, -1)
+            self.cam_tilt.build_lut(-1*self.cam_tilt_cali_val, -1)
+            self.startup_times['servo_lut'] = time.perf_counter() - start
+        return self.startup_times
+
+    def startup_report(self):
+        ''' return: import time and the time of each startup step so far, as readable text '''
+        lines = [f"{'import':>12}: {_import_time * 1000:8.1f} ms"]
+        for name, seconds in self.startup_times.items():
+            lines.append(f"{name:>12}: {seconds * 1000:8.1f} ms")
+        lines.append(f"{'total':>12}: {(_import_time + sum(self.startup_times.values())) * 1000:8.1f} ms")
+        pending = [name for name in self.SUBSYSTEMS if name not in self.startup_times]
+        if pending:
+            lines.append(f"not started: {', '.join(pending)}")
+        return '\n'.join(lines)
+
+    def _motor_duty(self, motor, speed):
+        ''' get direction pin level and pwm percent of a motor
+
+        param motor: motor index, 0 means left motor, 1 means right motor
         type motor: int
         param speed: speed
-        type speed: int      
+        type speed: int
+        return: (direction pin level, pulse width percent)
         '''
         speed = constrain(speed, -100, 100)
-        motor -= 1
         if speed >= 0:
             direction = 1 * self.cali_dir_value[motor]
-        elif speed < 0:
+        else:
             direction = -1 * self.cali_dir_value[motor]
         speed = abs(speed)
-        # print(f"direction: {direction}, speed: {speed}")
         if speed != 0:
             speed = int(speed /2 ) + 50
         speed = speed - self.cali_speed_value[motor]
-        if direction < 0:
-            self.motor_direction_pins[motor].high()
-            self.motor_speed_pins[motor].pulse_width_percent(speed)
+        return (1 if direction < 0 else 0), speed
+
+    def set_motors_speed(self, left_speed, right_speed):
+        ''' set both motor speeds, the direction pins and the two pwm channels
+        are set while holding the bus, like drive(), and the pwm channels are
+        written in one I2C transaction
+
+        param left_speed: left motor speed
+        type left_speed: int
+        param right_speed: right motor speed
+        type right_speed: int
+        '''
+        levels, duties = self._motor_duties(left_speed, right_speed)
+        if _batched_io:
+            with self.motor_speed_pins[0].transaction():
+                self._set_motor_levels(levels)
+                self.motor_speed_pins[0].write_many(duties, percent=True)
         else:
-            self.motor_direction_pins[motor].low()
+            self._set_motor_levels(levels)
+            for pin, percent in duties.items():
+                pin.pulse_width_percent(percent)
+
+    def _motor_duties(self, left_speed, right_speed):
+        # direction pin levels and pwm percents of both motors, nothing is written
+        levels = []
+        duties = {}
+        for motor, speed in enumerate((left_speed, right_speed)):
+            level, percent = self._motor_duty(motor, speed)
+            levels.append(level)
+            duties[self.motor_speed_pins[motor]] = percent
+        return levels, duties
+
+    def _set_motor_levels(self, levels):
+        for motor, level in enumerate(levels):
+            self._set_motor_level(motor, level)
+
+    def _set_motor_level(self, motor, level):
+        # skip the gpio write if the direction is unchanged
+        if self._motor_levels[motor] != level:
+            self.motor_direction_pins[motor].value(level)
+            self._motor_levels[motor] = level
+
+    def set_motor_speed(self, motor, speed):
+        ''' set motor speed
+        
+        param motor: motor index, 1 means left motor, 2 means right motor
+        type motor: int
+        param speed: speed
+        type speed: int      
+        '''
+        motor -= 1
+        level, speed = self._motor_duty(motor, speed)
+        if not _batched_io:
+            self._set_motor_level(motor, level)
+            self.motor_speed_pins[motor].pulse_width_percent(speed)
+            return
+        with self.motor_speed_pins[motor].transaction():
+            self._set_motor_level(motor, level)
             self.motor_speed_pins[motor].pulse_width_percent(speed)
 
     def motor_speed_calibration(self, value):
@@ -168,10 +361,16 @@ class Picarx(object):
         self.config_flie.set("picarx_dir_servo", "%s"%value)
         self.dir_servo_pin.angle(value)
 
+    def _servo_angle(self, servo, angle, offset, direction=1):
+        # lookup table write when available, else the same angle through angle()
+        if _servo_lut:
+            servo.fast_angle(angle, offset, direction)
+        else:
+            servo.angle(direction * (angle + offset))
+
     def set_dir_servo_angle(self, value):
         self.dir_current_angle = constrain(value, self.DIR_MIN, self.DIR_MAX)
-        angle_value  = self.dir_current_angle + self.dir_cali_val
-        self.dir_servo_pin.angle(angle_value)
+        self._servo_angle(self.dir_servo_pin, self.dir_current_angle, self.dir_cali_val)
 
     def cam_pan_servo_calibrate(self, value):
         self.cam_pan_cali_val = value
@@ -185,60 +384,115 @@ class Picarx(object):
 
     def set_cam_pan_angle(self, value):
         value = constrain(value, self.CAM_PAN_MIN, self.CAM_PAN_MAX)
-        self.cam_pan.angle(-1*(value + -1*self.cam_pan_cali_val))
+        self._servo_angle(self.cam_pan, value, -1*self.cam_pan_cali_val, -1)
 
     def set_cam_tilt_angle(self,value):
         value = constrain(value, self.CAM_TILT_MIN, self.CAM_TILT_MAX)
-        self.cam_tilt.angle(-1*(value + -1*self.cam_tilt_cali_val))
+        self._servo_angle(self.cam_tilt, value, -1*self.cam_tilt_cali_val, -1)
 
     def set_power(self, speed):
-        self.set_motor_speed(1, speed)
-        self.set_motor_speed(2, speed)
+        self.set_motors_speed(speed, speed)
 
-    def backward(self, speed):
-        current_angle = self.dir_current_angle
-        if current_angle != 0:
-            abs_current_angle = abs(current_angle)
-            if abs_current_angle > self.DIR_MAX:
-                abs_current_angle = self.DIR_MAX
-            power_scale = (100 - abs_current_angle) / 100.0 
-            if (current_angle / abs_current_angle) > 0:
-                self.set_motor_speed(1, -1*speed)
-                self.set_motor_speed(2, speed * power_scale)
-            else:
-                self.set_motor_speed(1, -1*speed * power_scale)
-                self.set_motor_speed(2, speed )
-        else:
-            self.set_motor_speed(1, -1*speed)
-            self.set_motor_speed(2, speed)  
+    def _wheel_speeds(self, speed, backward=False, current_angle=None):
+        ''' get left and right motor speeds for a steering angle,
+        the inner wheel is slowed down by the steering angle
 
-    def forward(self, speed):
-        current_angle = self.dir_current_angle
+        param speed: speed
+        type speed: int
+        param backward: use the backward mapping
+        type backward: bool
+        param current_angle: steering angle, None for the current one
+        type current_angle: int
+        return: (left speed, right speed)
+        '''
+        if current_angle is None:
+            current_angle = self.dir_current_angle
         if current_angle != 0:
             abs_current_angle = abs(current_angle)
             if abs_current_angle > self.DIR_MAX:
                 abs_current_angle = self.DIR_MAX
             power_scale = (100 - abs_current_angle) / 100.0
-            if (current_angle / abs_current_angle) > 0:
-                self.set_motor_speed(1, 1*speed * power_scale)
-                self.set_motor_speed(2, -speed) 
-            else:
-                self.set_motor_speed(1, speed)
-                self.set_motor_speed(2, -1*speed * power_scale)
-        else:
-            self.set_motor_speed(1, speed)
-            self.set_motor_speed(2, -1*speed)                  
+            if backward:
+                if current_angle > 0:
+                    return -1*speed, speed * power_scale
+                return -1*speed * power_scale, speed
+            if current_angle > 0:
+                return 1*speed * power_scale, -speed
+            return speed, -1*speed * power_scale
+        if backward:
+            return -1*speed, speed
+        return speed, -1*speed
+
+    def backward(self, speed):
+        self.set_motors_speed(*self._wheel_speeds(speed, backward=True))
+
+    def forward(self, speed):
+        self.set_motors_speed(*self._wheel_speeds(speed))
+
+    def drive(self, speed, steer):
+        ''' set steering angle and speed as one update
+
+        Motor direction levels, motor duties and the steering servo pulse are
+        computed first, then the direction pins and both writes are set while
+        holding the bus, so set_motors_speed() and the other motor setters of
+        another thread can not interleave with them. Registers that already
+        hold the value are skipped by the register shadow.
+
+        param speed: speed, positive drives forward() and negative drives backward()
+        type speed: int
+        param steer: steering angle
+        type steer: int
+        return: False if any write failed
+        '''
+        if not _batched_io:
+            # no transaction or batched writes, set them one by one
+            self.set_dir_servo_angle(steer)
+            self.set_motors_speed(*self._wheel_speeds(abs(speed), backward=speed < 0))
+            return True
+        self.dir_current_angle = constrain(steer, self.DIR_MIN, self.DIR_MAX)
+        pulse_width = self.dir_servo_pin.angle_word(self.dir_current_angle, self.dir_cali_val)
+        levels, duties = self._motor_duties(*self._wheel_speeds(abs(speed), backward=speed < 0))
+        with self.dir_servo_pin.transaction():
+            self._set_motor_levels(levels)
+            result = self.motor_speed_pins[0].write_many(duties, percent=True)
+            _result = self.dir_servo_pin.write_many({self.dir_servo_pin: pulse_width})
+        return result is not False and _result is not False
 
     def stop(self):
         '''
         Execute twice to make sure it stops
         '''
         for _ in range(2):
-            self.motor_speed_pins[0].pulse_width_percent(0)
-            self.motor_speed_pins[1].pulse_width_percent(0)
+            self._stop_motors()
             time.sleep(0.002)
 
+    def _stop_motors(self):
+        if not _batched_io:
+            for pin in self.motor_speed_pins:
+                pin.pulse_width_percent(0)
+            return
+        duties = {pin: 0 for pin in self.motor_speed_pins}
+        # force, so the register shadow does not suppress repeated stops
+        self.motor_speed_pins[0].write_many(duties, percent=True, force=True)
+
+    def start_ranging(self, rate=10):
+        ''' range in background, get_distance() then returns the latest filtered distance without waiting
+
+        param rate: pings per second
+        type rate: float
+        '''
+        if self.ranging is None:
+            self.ranging = RangingService(self.ultrasonic, rate=rate)
+        self.ranging.start()
+
+    def stop_ranging(self):
+        if self.ranging is not None:
+            self.ranging.stop()
+
     def get_distance(self):
+        if self.ranging is not None and self.ranging.is_running():
+            # -1 like a timeout once no ping got through for RANGING_MAX_AGE intervals
+            return self.ranging.read(max_age=self.RANGING_MAX_AGE * self.ranging.interval)
         return self.ultrasonic.read()
 
     def set_grayscale_reference(self, value):
@@ -264,6 +518,18 @@ class Picarx(object):
                 return True
         return False
 
+    def get_cliff_status_batch(self, gm_val_array, hysteresis=0):
+        ''' cliff status of many grayscale samples at once
+
+        param gm_val_array: N x 3 array of grayscale datas, oldest first
+        type gm_val_array: numpy.ndarray
+        param hysteresis: hysteresis half width around the cliff reference
+        type hysteresis: float
+        return: (N bool array, True means cliff; K x 2 array of transitions, [sample index, new status])
+        '''
+        mask = hysteresis_mask(gm_val_array, self.cliff_reference, hysteresis).any(axis=1)
+        return mask, mask_transitions(mask)
+
     def set_cliff_reference(self, value):
         if isinstance(value, list) and len(value) == 3:
             self.cliff_reference = value
@@ -271,6 +537,111 @@ class Picarx(object):
         else:
             raise ValueError("grayscale reference must be a 1*3 list")
 
+    def _compile_frames(self, frames, speed):
+        # turn frames into timeline events, tracking steering and motor levels like the setters do,
+        # angle stays None until the action sets the steering
+        angle = None
+        levels = [None, None]
+        events = []
+        at = 0.0
+        for commands, hold in frames:
+            widths = {}
+            changed = []
+            motors = None
+            for command, value in commands.items():
+                if command == 'reset':
+                    angle = 0
+                    motors = None
+                    for pin in self.motor_speed_pins:
+                        widths[pin] = 0
+                    widths[self.dir_servo_pin] = self.dir_servo_pin.angle_word(0, self.dir_cali_val)
+                    widths[self.cam_pan] = self.cam_pan.angle_word(0, -1*self.cam_pan_cali_val, -1)
+                    widths[self.cam_tilt] = self.cam_tilt.angle_word(0, -1*self.cam_tilt_cali_val, -1)
+                elif command == 'stop':
+                    # like stop(), the direction pins are left as they are
+                    motors = None
+                    for pin in self.motor_speed_pins:
+                        widths[pin] = 0
+                elif command == 'dir':
+                    angle = constrain(value, self.DIR_MIN, self.DIR_MAX)
+                    widths[self.dir_servo_pin] = self.dir_servo_pin.angle_word(angle, self.dir_cali_val)
+                elif command == 'pan':
+                    value = constrain(value, self.CAM_PAN_MIN, self.CAM_PAN_MAX)
+                    widths[self.cam_pan] = self.cam_pan.angle_word(value, -1*self.cam_pan_cali_val, -1)
+                elif command == 'tilt':
+                    value = constrain(value, self.CAM_TILT_MIN, self.CAM_TILT_MAX)
+                    widths[self.cam_tilt] = self.cam_tilt.angle_word(value, -1*self.cam_tilt_cali_val, -1)
+                elif command == 'motors':
+                    motors = value
+                elif command in ('forward', 'backward'):
+                    # the compiled action is cached, so it can not depend on the steering at play time
+                    if angle is None:
+                        raise ValueError(f"Action command {command} needs a 'dir' or 'reset' before it")
+                    motors = self._wheel_speeds(value, backward=command == 'backward', current_angle=angle)
+                else:
+                    raise ValueError(f"Unknown action command: {command}")
+            if motors is not None:
+                for motor, motor_speed in enumerate(motors):
+                    level, percent = self._motor_duty(motor, motor_speed)
+                    if levels[motor] != level:
+                        changed.append((self.motor_direction_pins[motor], level))
+                        levels[motor] = level
+                    pin = self.motor_speed_pins[motor]
+                    widths[pin] = pin.percent_to_pulse_width(percent)
+            events.append((at, widths, tuple(changed)))
+            at += hold / speed
+        return events, at, angle, levels
+
+    def compile_action(self, name, frames, speed=1.0):
+        ''' compile an action into a timeline of register writes, cached by name,
+        speed and calibration, the least recently used ones are dropped beyond ACTION_CACHE_SIZE
+
+        param name: action name, the cache key, compile again under a new name after changing frames
+        type name: str
+        param frames: list of (commands, hold time(s)), commands is a dict of
+                      'dir', 'pan', 'tilt': angle;
+                      'motors': (left, right) speeds as set_motor_speed(1, left) and set_motor_speed(2, right);
+                      'forward', 'backward': speed, steered by the last 'dir' or 'reset' of the action, one must come first;
+                      'stop', 'reset': None
+        type frames: list
+        param speed: playback speed, hold times are divided by it
+        type speed: float
+        return: (timeline, final steering angle or None if the action does not steer, final motor direction levels)
+        '''
+        key = (name, speed, self.dir_cali_val, self.cam_pan_cali_val, self.cam_tilt_cali_val,
+               str(self.cali_dir_value), str(self.cali_speed_value))
+        compiled = self._actions.get(key)
+        if compiled is not None:
+            self._actions.move_to_end(key)
+            return compiled
+        events, duration, angle, levels = self._compile_frames(frames, speed)
+        compiled = (Timeline(self.dir_servo_pin, events, duration), angle, levels)
+        self._actions[key] = compiled
+        while len(self._actions) > self.ACTION_CACHE_SIZE:
+            self._actions.popitem(last=False)
+        return compiled
+
+    def play_action(self, name, frames, speed=1.0):
+        ''' play an action, compiling it on first use, see compile_action()
+
+        param name: action name
+        type name: str
+        param frames: list of (commands, hold time(s))
+        type frames: list
+        param speed: playback speed, hold times are divided by it
+        type speed: float
+        '''
+        if not (_batched_io and _servo_lut):
+            play_frames(self, frames, speed)
+            return
+        timeline, angle, levels = self.compile_action(name, frames, speed)
+        timeline.play()
+        if angle is not None:
+            self.dir_current_angle = angle
+        for motor, level in enumerate(levels):
+            if level is not None:
+                self._motor_levels[motor] = level
+
     def reset(self):
         self.stop()
         self.set_dir_servo_angle(0)
@@ -278,6 +649,13 @@ class Picarx(object):
         self.set_cam_pan_angle(0)
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ['--startup']:
+        px = Picarx(lazy=True)
+        print(px.get_distance())
+        print(px.startup_report())
+        px.warmup()
+        print(px.startup_report())
+        sys.exit()
     px = Picarx()
     px.forward(50)
     time.sleep(1)
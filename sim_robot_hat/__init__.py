@@ -1,21 +1,69 @@
 #!/usr/bin/env python3
 """
 Robot Hat Library
+
+Classes and functions are imported from their modules on first access
+(PEP 562), so `from sim_robot_hat import PWM` does not load the audio,
+numpy or asyncio dependencies of the other modules.
 """
-from .adc import ADC
-from .filedb import fileDB
-from .i2c import I2C
-from .modules import *
-# from .music import Music
-from .motor import Motor, Motors
-from .pin import Pin
-from .pwm import PWM
-from .servo import Servo
-# from .tts import TTS
-from .utils import *
-from .robot import Robot
+import importlib
 from .version import __version__
 
+_LAZY = {
+    'ADC': '.adc',
+    'ADCSampler': '.adc_sampler',
+    'BusScheduler': '.bus_scheduler',
+    'fileDB': '.filedb',
+    'I2C': '.i2c',
+    'ADXL345': '.modules',
+    'Buzzer': '.modules',
+    'Grayscale_Module': '.modules',
+    'RGB_LED': '.modules',
+    'RangingService': '.modules',
+    'Ultrasonic': '.modules',
+    'hysteresis_mask': '.modules',
+    'mask_transitions': '.modules',
+    'MotionExecutor': '.motion_executor',
+    'Music': '.music',
+    'Motor': '.motor',
+    'Motors': '.motor',
+    'Pin': '.pin',
+    'PowerUpScheduler': '.power_up',
+    'PWM': '.pwm',
+    'Servo': '.servo',
+    'TTS': '.tts',
+    'command_exists': '.utils',
+    'get_battery_voltage': '.utils',
+    'get_ip': '.utils',
+    'is_installed': '.utils',
+    'mapping': '.utils',
+    'reset_mcu': '.utils',
+    'run_command': '.utils',
+    'set_volume': '.utils',
+    'Robot': '.robot',
+    'TrajectoryWriter': '.trajectory',
+    'Timeline': '.trajectory',
+    'SimBus': '.sim_mcu',
+    'SimMCU': '.sim_mcu',
+}
+
+# Music and TTS need the audio stack, `import *` leaves them out like before
+__all__ = [name for name in _LAZY if name not in ('Music', 'TTS')] + ['__version__']
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    # cache it, so later accesses do not come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 def __usage__():
     print('''
     Usage: robot_hat [option]
@@ -28,6 +76,7 @@ def __usage__():
     quit()
 
 def get_firmware_version():
+    from .i2c import I2C
     ADDR = [0x14, 0x15]
     VERSSION_REG_ADDR = 0x05
     i2c = I2C(ADDR)
@@ -37,6 +86,7 @@ def get_firmware_version():
 def __main__():
     import sys
     import os
+    from .utils import reset_mcu
     if len(sys.argv) == 2:
         if sys.argv[1] == "reset_mcu":
             reset_mcu()
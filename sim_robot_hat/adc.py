@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from .i2c import I2C
+from .bus_scheduler import BusScheduler
 
 
 class ADC(I2C):
@@ -8,6 +9,9 @@ class ADC(I2C):
     """
     ADDR = [0x14, 0x15]
 
+    PRIORITY = BusScheduler.PRIORITY_LOW
+    """Telemetry reads yield to motor and servo writes"""
+
     def __init__(self, chn, address=None, *args, **kwargs):
         """
         Analog to digital converter
@@ -21,6 +25,12 @@ class ADC(I2C):
             super().__init__(self.ADDR, *args, **kwargs)
         self._debug(f'ADC device address: 0x{self.address:02X}')
 
+        self.channel = self._parse_channel(chn)
+        # Convert to Register value
+        self.chn = self._channel_reg(self.channel)
+
+    @staticmethod
+    def _parse_channel(chn):
         if isinstance(chn, str):
             # If chn is a string, assume it's a pin name, remove A and convert to int
             if chn.startswith("A"):
@@ -32,9 +42,20 @@ class ADC(I2C):
         if chn < 0 or chn > 7:
             raise ValueError(
                 f'ADC channel should be between [0, 7], not "{chn}"')
-        chn = 7 - chn
-        # Convert to Register value
-        self.chn = chn | 0x10
+        return chn
+
+    @staticmethod
+    def _channel_reg(channel):
+        return (7 - channel) | 0x10
+
+    def _read_reg(self, reg):
+        # Write register address and read value in one combined transaction
+        result = self.write_read([reg, 0, 0], 2)
+        if not result:
+            return 0
+        msb, lsb = result
+        # Combine MSB and LSB
+        return (msb << 8) + lsb
 
     def read(self):
         """
@@ -43,16 +64,33 @@ class ADC(I2C):
         :return: ADC value(0-4095)
         :rtype: int
         """
-        # Write register address
-        self.write([self.chn, 0, 0])
-        # Read values
-        msb, lsb = super().read(2)
-
-        # Combine MSB and LSB
-        value = (msb << 8) + lsb
-        self._debug(f"Read value: {value}")
+        value = self._read_reg(self.chn)
+        if __debug__ and self._debug_enabled:
+            self._debug(f"Read value: {value}")
         return value
 
+    def read_many(self, channels):
+        """
+        Read several channels of this ADC device in a row, holding the bus,
+        one combined transaction per channel
+
+        :param channels: channels to read, channel numbers(0-7), names(A0-A7) or ADC objects on the same device
+        :type channels: list
+        :return: ADC values(0-4095), in the order of channels
+        :rtype: list
+        """
+        regs = []
+        for chn in channels:
+            if isinstance(chn, ADC):
+                regs.append(chn.chn)
+            else:
+                regs.append(self._channel_reg(self._parse_channel(chn)))
+        with self.transaction():
+            values = [self._read_reg(reg) for reg in regs]
+        if __debug__ and self._debug_enabled:
+            self._debug(f"Read values: {values}")
+        return values
+
     def read_voltage(self):
         """
         Read the ADC value and convert to voltage
@@ -66,3 +104,51 @@ class ADC(I2C):
         voltage = value * 3.3 / 4095
         self._debug(f"Read voltage: {voltage}")
         return voltage
+
+
+def benchmark(samples=1000, latency=0.0001):
+    """
+    Compare per-sample latency of ADC reads on the simulated bus: the
+    legacy path (command write, then one transaction per byte), the block
+    path (command write, then I2C.read() of both bytes in one transaction)
+    and the combined write-read transaction of read()
+
+    :param samples: number of samples per path
+    :type samples: int
+    :param latency: simulated duration of one bus transaction(s)
+    :type latency: float
+    """
+    import time
+    adc = ADC("A0")
+    sim_bus = adc._smbus
+    old_latency, sim_bus.latency = sim_bus.latency, latency
+
+    def legacy():
+        with adc.transaction():
+            adc.write([adc.chn, 0, 0])
+            msb = adc._read_byte()
+            lsb = adc._read_byte()
+        return (msb << 8) + lsb
+
+    def block():
+        with adc.transaction():
+            adc.write([adc.chn, 0, 0])
+            # ADC.read() overrides the block read of I2C
+            msb, lsb = I2C.read(adc, 2)
+        return (msb << 8) + lsb
+
+    try:
+        for name, read in (("legacy", legacy), ("block", block), ("combined", adc.read)):
+            transactions = sim_bus.transactions
+            start = time.perf_counter()
+            for _ in range(samples):
+                read()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8}: {elapsed / samples * 1e6:8.1f} us/sample, "
+                  f"{(sim_bus.transactions - transactions) / samples:.0f} transactions/sample")
+    finally:
+        sim_bus.latency = old_latency
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+import threading
+import time
+from .adc import ADC
+from .utils import _import_numpy
+
+
+class ADCSampler(object):
+    """
+    Continuous ADC sampler
+
+    A background thread reads a set of channels at a fixed rate into a
+    preallocated ring buffer, so several consumers (cliff detection, line
+    following, battery monitor) share one sampling stream instead of each
+    polling the bus. Consumers read windows of the latest samples, or
+    windowed mean/min/max and decimated views of them.
+
+    Requires numpy.
+    """
+
+    def __init__(self, channels, rate=100, capacity=1024):
+        """
+        Initialize the sampler
+
+        :param channels: channels to sample, names(A0-A7), numbers(0-7) or ADC objects, all on one device
+        :type channels: list
+        :param rate: samples per second
+        :type rate: float
+        :param capacity: number of samples kept in the ring buffer
+        :type capacity: int
+        """
+        np = _import_numpy()
+        self._np = np
+        self.channels = list(channels)
+        if isinstance(self.channels[0], ADC):
+            self._adc = self.channels[0]
+        else:
+            self._adc = ADC(self.channels[0])
+        self.rate = rate
+        self.capacity = capacity
+        self._buffer = np.zeros((capacity, len(self.channels)), dtype=np.uint16)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread = None
+        self.overruns = 0
+        """Number of samples that missed their deadline"""
+
+    def start(self):
+        """Start sampling in background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._loop, name="ADCSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self):
+        """
+        Check if sampling is running
+
+        :return: True if running
+        :rtype: bool
+        """
+        return self._running.is_set()
+
+    def _loop(self):
+        interval = 1.0 / self.rate
+        next_time = time.monotonic()
+        while self._running.is_set():
+            self.sample()
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overruns += 1
+                # Skip missed samples instead of sampling back to back
+                next_time += -delay // interval * interval
+
+    def sample(self):
+        """
+        Read all channels once into the ring buffer, called by the sampling thread
+
+        :return: ADC values of the channels
+        :rtype: list
+        """
+        values = self._adc.read_many(self.channels)
+        now = time.monotonic()
+        with self._lock:
+            index = self._count % self.capacity
+            self._buffer[index] = values
+            self._times[index] = now
+            self._count += 1
+        return values
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def _indices(self, n):
+        count = self._count
+        n = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+        return self._np.arange(count - n, count) % self.capacity
+
+    def window(self, n=None):
+        """
+        Get the latest samples, oldest first
+
+        :param n: number of samples, None for all samples in the buffer
+        :type n: int
+        :return: n x channels array
+        :rtype: numpy.ndarray
+        """
+        with self._lock:
+            return self._buffer[self._indices(n)]
+
+    def timestamps(self, n=None):
+        """
+        Get time.monotonic() timestamps of the latest samples, oldest first
+
+        :param n: number of samples, None for all samples in the buffer
+        :type n: int
+        :return: array of timestamps
+        :rtype: numpy.ndarray
+        """
+        with self._lock:
+            return self._times[self._indices(n)]
+
+    def latest(self):
+        """
+        Get the latest sample and its timestamp
+
+        :return: (values of the channels, time.monotonic() timestamp), (None, None) if there is no sample yet
+        :rtype: tuple
+        """
+        with self._lock:
+            if self._count == 0:
+                return None, None
+            index = (self._count - 1) % self.capacity
+            return self._buffer[index].tolist(), float(self._times[index])
+
+    def mean(self, n=None):
+        """
+        Get mean of each channel over the latest samples
+
+        :param n: number of samples, None for all samples in the buffer
+        :type n: int
+        :return: array of means, one per channel
+        :rtype: numpy.ndarray
+        """
+        return self.window(n).mean(axis=0)
+
+    def min(self, n=None):
+        """
+        Get min of each channel over the latest samples
+
+        :param n: number of samples, None for all samples in the buffer
+        :type n: int
+        :return: array of min values, one per channel
+        :rtype: numpy.ndarray
+        """
+        return self.window(n).min(axis=0)
+
+    def max(self, n=None):
+        """
+        Get max of each channel over the latest samples
+
+        :param n: number of samples, None for all samples in the buffer
+        :type n: int
+        :return: array of max values, one per channel
+        :rtype: numpy.ndarray
+        """
+        return self.window(n).max(axis=0)
+
+    def decimate(self, factor, n=None, average=True):
+        """
+        Get the latest samples at a lower rate
+
+        :param factor: keep one sample out of factor
+        :type factor: int
+        :param n: number of samples before decimation, None for all samples in the buffer
+        :type n: int
+        :param average: average each group of factor samples, instead of picking the last one
+        :type average: bool
+        :return: (n // factor) x channels array, oldest first
+        :rtype: numpy.ndarray
+        """
+        data = self.window(n)
+        groups = len(data) // factor
+        # Drop the oldest samples that do not fill a group
+        data = data[len(data) - groups * factor:]
+        if average:
+            return data.reshape(groups, factor, data.shape[1]).mean(axis=1)
+        return data[factor - 1::factor]
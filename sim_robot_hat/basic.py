@@ -1,7 +1,50 @@
 # -*- coding: utf-8 -*-
 #!/usr/bin/env python3
 import logging
-import time
+import threading
+from collections import OrderedDict
+
+MAX_LOGGERS = 64
+"""Max number of shared loggers kept in the registry"""
+
+_loggers = OrderedDict()
+_loggers_lock = threading.Lock()
+
+
+def _get_logger(name, level):
+    """
+    Get the shared logger of a class name and debug level
+
+    All instances of a class with the same debug level share one logger
+    and handler. Least recently used loggers beyond MAX_LOGGERS are
+    dropped from the registry and the logging manager.
+
+    :param name: class name
+    :type name: str
+    :param level: debug level name, e.g. 'warning'
+    :type level: str
+    :return: shared logger
+    :rtype: logging.Logger
+    """
+    key = (name, level)
+    with _loggers_lock:
+        logger = _loggers.get(key)
+        if logger is not None:
+            _loggers.move_to_end(key)
+            return logger
+        logger = logging.getLogger(f"robot_hat.{name}.{level}")
+        if not logger.handlers:
+            ch = logging.StreamHandler()
+            form = "%(asctime)s	[%(levelname)s]	%(message)s"
+            ch.setFormatter(logging.Formatter(form))
+            ch.setLevel(_Basic_class.DEBUG_LEVELS[level])
+            logger.addHandler(ch)
+        logger.setLevel(_Basic_class.DEBUG_LEVELS[level])
+        _loggers[key] = logger
+        while len(_loggers) > MAX_LOGGERS:
+            _, old = _loggers.popitem(last=False)
+            logging.Logger.manager.loggerDict.pop(old.name, None)
+        return logger
 
 
 class _Basic_class(object):
@@ -28,17 +71,6 @@ class _Basic_class(object):
         :param debug_level: debug level, 0(critical), 1(error), 2(warning), 3(info) or 4(debug)
         :type debug_level: str/int
         """
-        self.logger = logging.getLogger(f"self._class_name-{time.time()}")
-        self.ch = logging.StreamHandler()
-        form = "%(asctime)s	[%(levelname)s]	%(message)s"
-        self.formatter = logging.Formatter(form)
-        self.ch.setFormatter(self.formatter)
-        self.logger.addHandler(self.ch)
-        self._debug = self.logger.debug
-        self._info = self.logger.info
-        self._warning = self.logger.warning
-        self._error = self.logger.error
-        self._critical = self.logger.critical
         self.debug_level = debug_level
 
     @property
@@ -56,6 +88,15 @@ class _Basic_class(object):
         else:
             raise ValueError(
                 f'Debug value must be 0(critical), 1(error), 2(warning), 3(info) or 4(debug), not "{debug}".')
-        self.logger.setLevel(self.DEBUG_LEVELS[self._debug_level])
-        self.ch.setLevel(self.DEBUG_LEVELS[self._debug_level])
+        # Loggers are shared per class and level, see _get_logger()
+        self.logger = _get_logger(type(self).__name__, self._debug_level)
+        self.ch = self.logger.handlers[0]
+        self.formatter = self.ch.formatter
+        self._debug = self.logger.debug
+        self._info = self.logger.info
+        self._warning = self.logger.warning
+        self._error = self.logger.error
+        self._critical = self.logger.critical
+        # Hot paths check this before formatting debug messages
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
         self._debug(f'Set logging level to [{self._debug_level}]')
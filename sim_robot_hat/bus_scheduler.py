@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+class BusScheduler(object):
+    """
+    Transaction scheduler of an I2C bus
+
+    Serialize bus transactions across threads, and optionally across
+    processes with a lock file. When several threads wait for the bus,
+    the one with the highest priority (lowest number) goes first, so
+    motor writes are not stuck behind telemetry reads.
+    """
+
+    PRIORITY_HIGH = 0
+    """Priority of actuator writes, e.g. motors and stop"""
+    PRIORITY_NORMAL = 1
+    """Default priority"""
+    PRIORITY_LOW = 2
+    """Priority of telemetry reads, e.g. ADC"""
+
+    LOCK_PATH = '/tmp/robot_hat_i2c-{bus}.lock'
+    """Lock file of the cross process lock"""
+
+    _schedulers = {}
+    _schedulers_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, bus):
+        """
+        Get the scheduler of a bus, there is one per bus and process
+
+        :param bus: I2C bus number
+        :type bus: int
+        :return: scheduler of the bus
+        :rtype: BusScheduler
+        """
+        scheduler = cls._schedulers.get(bus)
+        if scheduler is None:
+            with cls._schedulers_lock:
+                scheduler = cls._schedulers.setdefault(bus, cls(bus))
+        return scheduler
+
+    def __init__(self, bus):
+        """
+        Initialize the scheduler, use BusScheduler.get() instead
+
+        :param bus: I2C bus number
+        :type bus: int
+        """
+        self.bus = bus
+        self._cond = threading.Condition(threading.Lock())
+        self._owner = None
+        self._holds = []
+        """Nested holds of the owner, True for each one suspend() may give up"""
+        self._waiting = []
+        self._seq = itertools.count()
+        self._lock_file = None
+        self.reset_stats()
+
+    def enable_process_lock(self, path=None):
+        """
+        Also serialize bus access with other processes, using flock on a lock file.
+        Other processes may change registers behind the register shadow of
+        I2C, so shadow writes are not skipped while the lock is enabled
+
+        :param path: lock file path, default LOCK_PATH
+        :type path: str
+        """
+        if self._lock_file is not None:
+            return
+        if path is None:
+            path = self.LOCK_PATH.format(bus=self.bus)
+        self._lock_file = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+
+    def disable_process_lock(self):
+        """Stop serializing bus access with other processes"""
+        with self._cond:
+            if self._lock_file is not None:
+                os.close(self._lock_file)
+                self._lock_file = None
+
+    def process_locked(self):
+        """
+        Check if bus access is serialized with other processes
+
+        :return: True if the process lock is enabled
+        :rtype: bool
+        """
+        return self._lock_file is not None
+
+    def acquire(self, priority=PRIORITY_NORMAL, yieldable=False):
+        """
+        Wait for the bus, reentrant within a thread
+
+        :param priority: BusScheduler.PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :type priority: int
+        :param yieldable: suspend() may give this hold up, only for holds
+                          that do not need other threads kept out across retries
+        :type yieldable: bool
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._holds.append(yieldable)
+                return
+            self._transactions += 1
+            if self._owner is None and not self._waiting:
+                self._owner = me
+                self._holds = [yieldable]
+            else:
+                start = time.perf_counter()
+                ticket = (priority, next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                self._max_queue_depth = max(self._max_queue_depth,
+                                            len(self._waiting))
+                while self._owner is not None or self._waiting[0] != ticket:
+                    self._cond.wait()
+                heapq.heappop(self._waiting)
+                self._owner = me
+                self._holds = [yieldable]
+                wait = time.perf_counter() - start
+                self._contended += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                self._wait_by_priority[priority] = \
+                    self._wait_by_priority.get(priority, 0) + wait
+            lock_file = self._lock_file
+        if lock_file is not None:
+            import fcntl
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+    def release(self):
+        """Release the bus"""
+        with self._cond:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("release an I2C bus not owned by this thread")
+            self._holds.pop()
+            if self._holds:
+                return
+            if self._lock_file is not None:
+                import fcntl
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._owner = None
+            if self._waiting:
+                self._cond.notify_all()
+
+    def suspend(self):
+        """
+        Give up the bus completely, e.g. to sleep before a retry, take it
+        back with resume(). Nothing is given up if any hold of the calling
+        thread is not yieldable, a transaction keeps the bus to its end
+
+        :return: holds to pass to resume(), None if the bus was not given up
+        :rtype: list
+        """
+        with self._cond:
+            if self._owner != threading.get_ident() or not all(self._holds):
+                return None
+            holds = self._holds
+            self._holds = [True]
+        self.release()
+        return holds
+
+    def resume(self, holds, priority=PRIORITY_NORMAL):
+        """
+        Wait for the bus and take back the holds suspend() gave up
+
+        :param holds: return value of suspend()
+        :type holds: list
+        :param priority: BusScheduler.PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :type priority: int
+        """
+        if holds:
+            self.acquire(priority, yieldable=True)
+            with self._cond:
+                self._holds = holds
+
+    def transaction(self, priority=PRIORITY_NORMAL, yieldable=False):
+        """
+        Hold the bus for a group of reads/writes
+
+        :param priority: BusScheduler.PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :type priority: int
+        :param yieldable: retries inside may give the bus up while they back off, see acquire()
+        :type yieldable: bool
+        :return: context manager holding the bus
+        """
+        return _Transaction(self, priority, yieldable)
+
+    def queue_depth(self):
+        """
+        Number of threads waiting for the bus
+
+        :return: queue depth
+        :rtype: int
+        """
+        return len(self._waiting)
+
+    def stats(self):
+        """
+        Get contention statistics
+
+        :return: dict of transactions, contended, queue_depth, max_queue_depth,
+                 wait_total, wait_max, wait_mean(seconds) and wait_by_priority
+        :rtype: dict
+        """
+        with self._cond:
+            contended = self._contended
+            return {
+                'transactions': self._transactions,
+                'contended': contended,
+                'queue_depth': len(self._waiting),
+                'max_queue_depth': self._max_queue_depth,
+                'wait_total': self._wait_total,
+                'wait_max': self._wait_max,
+                'wait_mean': self._wait_total / contended if contended else 0.0,
+                'wait_by_priority': dict(self._wait_by_priority),
+            }
+
+    def reset_stats(self):
+        """Reset contention statistics"""
+        self._transactions = 0
+        self._contended = 0
+        self._max_queue_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_by_priority = {}
+
+
+class _Transaction(object):
+
+    def __init__(self, scheduler, priority, yieldable=False):
+        self._scheduler = scheduler
+        self._priority = priority
+        self._yieldable = yieldable
+
+    def __enter__(self):
+        self._scheduler.acquire(self._priority, self._yieldable)
+        return self._scheduler
+
+    def __exit__(self, *exc):
+        self._scheduler.release()
+        return False
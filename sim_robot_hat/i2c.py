@@ -1,21 +1,111 @@
 #!/usr/bin/env python3
 from .basic import _Basic_class
+from .bus_scheduler import BusScheduler
+from .trace import TraceBuffer
 from .utils import run_command
 # from smbus2 import SMBus
-import multiprocessing
+from .sim_mcu import SimBus, i2c_msg
+from collections import deque
+import random
+import time
+
+
+class RetryPolicy(object):
+    """
+    Retry policy of I2C transactions
+
+    Wait delay, delay*backoff, delay*backoff^2 ... (at most max_delay)
+    between tries, each randomized by +-jitter, and give up after retries
+    tries or when deadline seconds passed since the first try. The bus is
+    given up during the delay, except inside a transaction, which keeps it
+    for the delay, at most max_delay per retry.
+    """
+
+    def __init__(self, retries=None, delay=0.001, backoff=2.0, max_delay=0.02,
+                 jitter=0.5, deadline=None):
+        """
+        Initialize the retry policy
+
+        :param retries: max number of tries, None to use I2C.RETRY
+        :type retries: int
+        :param delay: delay before the first retry(s)
+        :type delay: float
+        :param backoff: delay multiplier for each retry
+        :type backoff: float
+        :param max_delay: max delay between retries(s)
+        :type max_delay: float
+        :param jitter: random delay variation, 0.5 means +-50%
+        :type jitter: float
+        :param deadline: max time spent on one transaction(s), None for no limit
+        :type deadline: float
+        """
+        self.retries = retries
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def get_delay(self, attempt):
+        """
+        Get delay before a retry
+
+        :param attempt: number of failed tries so far, starting from 1
+        :type attempt: int
+        :return: delay(s)
+        :rtype: float
+        """
+        delay = min(self.delay * self.backoff ** (attempt - 1), self.max_delay)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
 
 
 def _retry_wrapper(func):
 
     def wrapper(self, *arg, **kwargs):
-        for _ in range(self.RETRY):
+        policy = self.retry_policy
+        retries = policy.retries if policy.retries is not None else self.RETRY
+        start = time.monotonic()
+        for attempt in range(1, retries + 1):
+            self._scheduler.acquire(self.PRIORITY)
+            tracer = I2C._tracer
+            if tracer is not None:
+                t0 = time.perf_counter()
             try:
-                return func(self, *arg, **kwargs)
+                result = func(self, *arg, **kwargs)
             except OSError:
-                self._debug(f"OSError: {func.__name__}")
-                continue
-        else:
-            return False
+                if tracer is not None:
+                    tracer.record_call(func.__name__, self.address, arg, None,
+                                       t0, time.perf_counter() - t0, failed=True)
+                if __debug__ and self._debug_enabled:
+                    self._debug(f"OSError: {func.__name__}")
+            else:
+                if tracer is not None:
+                    tracer.record_call(func.__name__, self.address, arg, result,
+                                       t0, time.perf_counter() - t0)
+                self._record_result(True)
+                return result
+            finally:
+                self._scheduler.release()
+            self._record_result(False)
+            if attempt == retries:
+                break
+            delay = policy.get_delay(attempt)
+            if policy.deadline is not None and \
+                    time.monotonic() - start + delay > policy.deadline:
+                break
+            # Sleep without holding the bus, unless a transaction needs it
+            # kept so other threads can not interleave
+            holds = self._scheduler.suspend()
+            try:
+                time.sleep(delay)
+            finally:
+                self._scheduler.resume(holds, self.PRIORITY)
+        self._warning(
+            f"{func.__name__} failed after {attempt} tries, device 0x{self.address:02X}")
+        self._error_stats[self._shadow_key()]['failures'] += 1
+        return False
 
     return wrapper
 
@@ -25,9 +115,44 @@ class I2C(_Basic_class):
     I2C bus read/write functions
     """
     RETRY = 5
+    RETRY_POLICY = RetryPolicy()
+    """Default retry policy, set retry_policy on an instance to override"""
+    PRIORITY = BusScheduler.PRIORITY_NORMAL
+    """Bus scheduler priority of this device's transactions"""
 
     # i2c_lock = multiprocessing.Value('i', 0)
 
+    SCAN_TTL = 10.0
+    """Seconds a cached bus scan stays valid"""
+    SCAN_RANGE = range(0x03, 0x78)
+    """Addresses probed by an in-process scan, same as i2cdetect"""
+
+    _scan_cache = {}
+    """Bus scan cache, bus -> (timestamp, addresses)"""
+
+    _shadows = {}
+    """Register shadow, (bus, address) -> {register: last written word}"""
+    _stale_shadows = {}
+    """Values the device lost, e.g. on an MCU reset, kept for resync_shadow(),
+    (bus, address) -> {register: last written word}"""
+    _shadow_stats = {}
+    """Shadow counters, (bus, address) -> {'writes': int, 'suppressed': int}"""
+
+    ERROR_WINDOW = 50
+    """Number of recent transactions the error rate is computed over"""
+    ERROR_RATE_THRESHOLD = 0.5
+    """Error rate that triggers the recovery hook"""
+    RECOVERY_INTERVAL = 5.0
+    """Min seconds between two recoveries"""
+
+    _tracer = None
+    """Trace buffer recording all transactions, None when tracing is off"""
+
+    _error_stats = {}
+    """Error counters, (bus, address) -> dict"""
+    _recovery_hook = None
+    _last_recovery = None
+
     def __init__(self, address=None, bus=1, *args, **kwargs):
         """
         Initialize the I2C bus
@@ -39,11 +164,12 @@ class I2C(_Basic_class):
         """
         super().__init__(*args, **kwargs)
         self._bus = bus
-        self._smbus = None
+        self._smbus = SimBus.get(bus)
+        self._scheduler = BusScheduler.get(bus)
+        self.retry_policy = self.RETRY_POLICY
         if isinstance(address, list):
-            connected_devices = self.scan()
             for _addr in address:
-                if _addr in connected_devices:
+                if self.probe(_addr):
                     self.address = _addr
                     break
             else:
@@ -56,42 +182,69 @@ class I2C(_Basic_class):
     @_retry_wrapper
     def _write_byte(self, data):
         # with I2C.i2c_lock.get_lock():
-        self._debug(f"_write_byte: [0x{data:02X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_write_byte: [0x{data:02X}]")
         result = self._smbus.write_byte(self.address, data)
         return result
 
     @_retry_wrapper
     def _write_byte_data(self, reg, data):
         # with I2C.i2c_lock.get_lock():
-        self._debug(f"_write_byte_data: [0x{reg:02X}] [0x{data:02X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_write_byte_data: [0x{reg:02X}] [0x{data:02X}]")
         return self._smbus.write_byte_data(self.address, reg, data)
 
     @_retry_wrapper
     def _write_word_data(self, reg, data):
         # with I2C.i2c_lock.get_lock():
-        self._debug(f"_write_word_data: [0x{reg:02X}] [0x{data:04X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_write_word_data: [0x{reg:02X}] [0x{data:04X}]")
         return self._smbus.write_word_data(self.address, reg, data)
 
     @_retry_wrapper
     def _write_i2c_block_data(self, reg, data):
         # with I2C.i2c_lock.get_lock():
-        self._debug(
-            f"_write_i2c_block_data: [0x{reg:02X}] {[f'0x{i:02X}' for i in data]}"
-        )
+        if __debug__ and self._debug_enabled:
+            self._debug(
+                f"_write_i2c_block_data: [0x{reg:02X}] {[f'0x{i:02X}' for i in data]}"
+            )
         return self._smbus.write_i2c_block_data(self.address, reg, data)
 
+    @_retry_wrapper
+    def _write_read(self, data, length):
+        write = i2c_msg.write(self.address, data)
+        read = i2c_msg.read(self.address, length)
+        self._smbus.i2c_rdwr(write, read)
+        result = bytes(read)
+        if __debug__ and self._debug_enabled:
+            self._debug(
+                f"_write_read: {[f'0x{i:02X}' for i in data]} {[f'0x{i:02X}' for i in result]}"
+            )
+        return result
+
+    @_retry_wrapper
+    def _read_block(self, length):
+        read = i2c_msg.read(self.address, length)
+        self._smbus.i2c_rdwr(read)
+        result = bytes(read)
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_read_block: {[f'0x{i:02X}' for i in result]}")
+        return result
+
     @_retry_wrapper
     def _read_byte(self):
         # with I2C.i2c_lock.get_lock():
         result = self._smbus.read_byte(self.address)
-        self._debug(f"_read_byte: [0x{result:02X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_read_byte: [0x{result:02X}]")
         return result
 
     @_retry_wrapper
     def _read_byte_data(self, reg):
         # with I2C.i2c_lock.get_lock():
         result = self._smbus.read_byte_data(self.address, reg)
-        self._debug(f"_read_byte_data: [0x{reg:02X}] [0x{result:02X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_read_byte_data: [0x{reg:02X}] [0x{result:02X}]")
         return result
 
     @_retry_wrapper
@@ -99,16 +252,18 @@ class I2C(_Basic_class):
         # with I2C.i2c_lock.get_lock():
         result = self._smbus.read_word_data(self.address, reg)
         result_list = [result & 0xFF, (result >> 8) & 0xFF]
-        self._debug(f"_read_word_data: [0x{reg:02X}] [0x{result:04X}]")
+        if __debug__ and self._debug_enabled:
+            self._debug(f"_read_word_data: [0x{reg:02X}] [0x{result:04X}]")
         return result_list
 
     @_retry_wrapper
     def _read_i2c_block_data(self, reg, num):
         # with I2C.i2c_lock.get_lock():
         result = self._smbus.read_i2c_block_data(self.address, reg, num)
-        self._debug(
-            f"_read_i2c_block_data: [0x{reg:02X}] {[f'0x{i:02X}' for i in result]}"
-        )
+        if __debug__ and self._debug_enabled:
+            self._debug(
+                f"_read_i2c_block_data: [0x{reg:02X}] {[f'0x{i:02X}' for i in result]}"
+            )
         return result
 
     @_retry_wrapper
@@ -118,18 +273,65 @@ class I2C(_Basic_class):
         :return: True if the I2C device is ready, False otherwise
         :rtype: bool
         """
-        addresses = self.scan()
-        if self.address in addresses:
+        return self.probe(self.address)
+
+    def probe(self, address):
+        """Check if a device answers on an address
+
+        Probe with a single in-process read if the bus is open, otherwise
+        look it up in the (cached) bus scan.
+
+        :param address: I2C device address
+        :type address: int
+        :return: True if the device answers, False otherwise
+        :rtype: bool
+        """
+        if self._smbus is None:
+            return address in self.scan()
+        self._scheduler.acquire(self.PRIORITY)
+        try:
+            self._smbus.read_byte(address)
             return True
-        else:
+        except OSError:
             return False
+        finally:
+            self._scheduler.release()
 
-    def scan(self):
+    def scan(self, refresh=False):
         """Scan the I2C bus for devices
 
+        Results are cached per bus for SCAN_TTL seconds.
+
+        :param refresh: ignore the cached result and scan again
+        :type refresh: bool
         :return: List of I2C addresses of devices found
         :rtype: list
         """
+        cached = I2C._scan_cache.get(self._bus)
+        if not refresh and cached is not None \
+                and time.monotonic() - cached[0] < self.SCAN_TTL:
+            return list(cached[1])
+
+        if self._smbus is not None:
+            addresses = [addr for addr in self.SCAN_RANGE if self.probe(addr)]
+        else:
+            addresses = self._scan_i2cdetect()
+        I2C._scan_cache[self._bus] = (time.monotonic(), addresses)
+        return list(addresses)
+
+    @classmethod
+    def clear_scan_cache(cls, bus=None):
+        """Drop cached bus scans
+
+        :param bus: I2C bus number, None for all buses
+        :type bus: int
+        """
+        if bus is None:
+            I2C._scan_cache.clear()
+        else:
+            I2C._scan_cache.pop(bus, None)
+
+    def _scan_i2cdetect(self):
         cmd = f"i2cdetect -y {self._bus}"
         # Run the i2cdetect command
         _, output = run_command(cmd)
@@ -178,19 +380,322 @@ class I2C(_Basic_class):
         # Write data
         if len(data_all) == 1:
             data = data_all[0]
-            self._write_byte(data)
+            return self._write_byte(data)
         elif len(data_all) == 2:
             reg = data_all[0]
             data = data_all[1]
-            self._write_byte_data(reg, data)
+            return self._write_byte_data(reg, data)
         elif len(data_all) == 3:
             reg = data_all[0]
             data = (data_all[2] << 8) + data_all[1]
-            self._write_word_data(reg, data)
+            return self._write_word_data(reg, data)
         else:
             reg = data_all[0]
             data = list(data_all[1:])
-            self._write_i2c_block_data(reg, data)
+            return self._write_i2c_block_data(reg, data)
+
+    def _new_error_stats(self):
+        return {'transactions': 0, 'errors': 0, 'failures': 0,
+                'recoveries': 0, 'window': deque(maxlen=self.ERROR_WINDOW),
+                'window_errors': 0}
+
+    def _record_result(self, ok):
+        key = self._shadow_key()
+        stats = I2C._error_stats.get(key)
+        if stats is None:
+            stats = I2C._error_stats.setdefault(key, self._new_error_stats())
+        window = stats['window']
+        if len(window) == window.maxlen and not window[0]:
+            stats['window_errors'] -= 1
+        window.append(ok)
+        stats['transactions'] += 1
+        if ok:
+            return
+        stats['errors'] += 1
+        stats['window_errors'] += 1
+        if I2C._recovery_hook is not None \
+                and len(window) >= min(10, window.maxlen) \
+                and stats['window_errors'] / len(window) >= self.ERROR_RATE_THRESHOLD:
+            self._recover(stats)
+
+    def _recover(self, stats):
+        now = time.monotonic()
+        if I2C._last_recovery is not None \
+                and now - I2C._last_recovery < self.RECOVERY_INTERVAL:
+            return
+        I2C._last_recovery = now
+        self._warning(
+            f"I2C error rate of device 0x{self.address:02X} over {self.ERROR_RATE_THRESHOLD}, recovering")
+        stats['recoveries'] += 1
+        stats['window'].clear()
+        stats['window_errors'] = 0
+        # The hook may reset the mcu, keep the shadow to restore registers.
+        # Restore it in place, a shadow_write that got here holds the dict
+        shadow = I2C._shadows.setdefault(self._shadow_key(), {})
+        saved = dict(shadow)
+        try:
+            I2C._recovery_hook()
+        except Exception as e:
+            self._error(f"I2C recovery hook failed: {e}")
+            return
+        shadow.clear()
+        shadow.update(saved)
+        self.resync_shadow()
+
+    def error_stats(self):
+        """
+        Get error counters of this device
+
+        :return: dict of transactions, errors, failures(transactions failed after all retries),
+                 recoveries and error_rate(of the last ERROR_WINDOW transactions)
+        :rtype: dict
+        """
+        stats = I2C._error_stats.get(self._shadow_key())
+        if stats is None:
+            stats = self._new_error_stats()
+        window = stats['window']
+        return {
+            'transactions': stats['transactions'],
+            'errors': stats['errors'],
+            'failures': stats['failures'],
+            'recoveries': stats['recoveries'],
+            'error_rate': stats['window_errors'] / len(window) if window else 0.0,
+        }
+
+    @classmethod
+    def enable_trace(cls, buffer=None):
+        """
+        Record every I2C transaction of all devices into a binary trace buffer
+
+        :param buffer: trace buffer, None to create a new TraceBuffer
+        :type buffer: sim_robot_hat.trace.TraceBuffer
+        :return: the trace buffer
+        :rtype: sim_robot_hat.trace.TraceBuffer
+        """
+        if buffer is None:
+            buffer = TraceBuffer()
+        I2C._tracer = buffer
+        return buffer
+
+    @classmethod
+    def disable_trace(cls):
+        """Stop recording I2C transactions"""
+        I2C._tracer = None
+
+    @classmethod
+    def set_recovery_hook(cls, hook=None, threshold=None):
+        """
+        Call a hook when the error rate of a device crosses the threshold,
+        the device registers are written back from the shadow afterwards
+
+        :param hook: function without arguments, e.g. utils.reset_mcu, None to disable
+        :type hook: function
+        :param threshold: error rate(0-1), default ERROR_RATE_THRESHOLD
+        :type threshold: float
+        """
+        I2C._recovery_hook = hook
+        if threshold is not None:
+            I2C.ERROR_RATE_THRESHOLD = threshold
+
+    def transaction(self, priority=None):
+        """
+        Hold the bus for a group of reads/writes, so other threads can not
+        interleave with them, retries inside keep the bus while they back off
+
+        :param priority: bus scheduler priority, default the device PRIORITY
+        :type priority: int
+        :return: context manager holding the bus
+        """
+        if priority is None:
+            priority = self.PRIORITY
+        return self._scheduler.transaction(priority)
+
+    def _shadow_transaction(self):
+        # A retry may give the bus up while it backs off, the shadow stays
+        # right as each write and its shadow update still share one hold
+        return self._scheduler.transaction(self.PRIORITY, yieldable=True)
+
+    def _shadow_key(self):
+        return (self._bus, self.address)
+
+    def write_block(self, reg, values):
+        """
+        Write 16-bit values to consecutive registers in one block transaction
+
+        :param reg: First register address
+        :type reg: int
+        :param values: 16-bit register values, each sent high byte first
+        :type values: list
+        :return: False if the write failed
+        :rtype: bool/None
+        """
+        data = []
+        for value in values:
+            data.append(value >> 8)
+            data.append(value & 0xff)
+        return self._write_i2c_block_data(reg, data)
+
+    def shadow_write(self, reg, value, force=False):
+        """
+        Write a 16-bit value to a register, skip the bus transaction if
+        the register shadow already holds the same value. The shadow only
+        sees this process' writes, so nothing is skipped while the bus
+        scheduler's process lock is enabled
+
+        :param reg: Register address
+        :type reg: int
+        :param value: 16-bit register value, sent high byte first
+        :type value: int
+        :param force: write even if the value is unchanged
+        :type force: bool
+        :return: False if the write failed
+        :rtype: bool/None
+        """
+        key = self._shadow_key()
+        shadow = I2C._shadows.setdefault(key, {})
+        stats = I2C._shadow_stats.setdefault(
+            key, {'writes': 0, 'suppressed': 0})
+        with self._shadow_transaction():
+            force = force or self._scheduler.process_locked()
+            if not force and shadow.get(reg) == value:
+                stats['suppressed'] += 1
+                return True
+            result = self.write([reg, value >> 8, value & 0xff])
+            if result is False:
+                # Register state is unknown after a failed write
+                shadow.pop(reg, None)
+            else:
+                shadow[reg] = value
+                stats['writes'] += 1
+            return result
+
+    def shadow_write_many(self, values, force=False):
+        """
+        Write 16-bit values to several registers, skip unchanged registers
+        and merge consecutive registers into one block transaction, nothing
+        is skipped while the bus scheduler's process lock is enabled
+
+        :param values: register address -> 16-bit value
+        :type values: dict
+        :param force: write even if the values are unchanged
+        :type force: bool
+        :return: False if any write failed
+        :rtype: bool/None
+        """
+        key = self._shadow_key()
+        shadow = I2C._shadows.setdefault(key, {})
+        stats = I2C._shadow_stats.setdefault(
+            key, {'writes': 0, 'suppressed': 0})
+        with self._shadow_transaction():
+            force = force or self._scheduler.process_locked()
+            pending = sorted((reg, value) for reg, value in values.items()
+                             if force or shadow.get(reg) != value)
+            stats['suppressed'] += len(values) - len(pending)
+
+            # Group into runs of consecutive registers
+            runs = []
+            for reg, value in pending:
+                if runs and reg == runs[-1][0] + len(runs[-1][1]):
+                    runs[-1][1].append(value)
+                else:
+                    runs.append((reg, [value]))
+
+            result = True
+            for start, run in runs:
+                if len(run) == 1:
+                    value = run[0]
+                    _result = self.write([start, value >> 8, value & 0xff])
+                else:
+                    _result = self.write_block(start, run)
+                for i, value in enumerate(run):
+                    if _result is False:
+                        shadow.pop(start + i, None)
+                    else:
+                        shadow[start + i] = value
+                if _result is False:
+                    result = False
+                else:
+                    stats['writes'] += 1
+            return result
+
+    def shadow_stats(self):
+        """
+        Get register shadow counters of this device
+
+        :return: dict with 'writes' and 'suppressed' counts
+        :rtype: dict
+        """
+        stats = I2C._shadow_stats.get(self._shadow_key(),
+                                      {'writes': 0, 'suppressed': 0})
+        return dict(stats)
+
+    def invalidate_shadow(self, reg=None):
+        """
+        Forget shadowed register values of this device, so next writes
+        go to the bus
+
+        :param reg: Register address, None for all registers
+        :type reg: int
+        """
+        key = self._shadow_key()
+        for shadows in (I2C._shadows, I2C._stale_shadows):
+            shadow = shadows.get(key)
+            if shadow is None:
+                continue
+            if reg is None:
+                shadow.clear()
+            else:
+                shadow.pop(reg, None)
+
+    def resync_shadow(self):
+        """
+        Write every shadowed register back to the device, including the
+        values marked stale by mark_all_stale(), use after the MCU lost its
+        register state, e.g. after utils.reset_mcu()
+        """
+        key = self._shadow_key()
+        shadow = I2C._shadows.setdefault(key, {})
+        stale = I2C._stale_shadows.pop(key, {})
+        with self._shadow_transaction():
+            # values written since they went stale are newer
+            stale.update(shadow)
+            for reg, value in stale.items():
+                if self.write([reg, value >> 8, value & 0xff]) is False:
+                    shadow.pop(reg, None)
+                else:
+                    shadow[reg] = value
+
+    @classmethod
+    def invalidate_all_shadows(cls, bus=None):
+        """
+        Forget shadowed register values of all devices
+
+        :param bus: I2C bus number, None for all buses
+        :type bus: int
+        """
+        for shadows in (I2C._shadows, I2C._stale_shadows):
+            for key, shadow in shadows.items():
+                if bus is None or key[0] == bus:
+                    shadow.clear()
+
+    @classmethod
+    def mark_all_stale(cls, bus=None):
+        """
+        Mark shadowed register values of all devices as lost by the device,
+        next writes go to the bus and resync_shadow() writes them back
+
+        :param bus: I2C bus number, None for all buses
+        :type bus: int
+        """
+        for key, shadow in I2C._shadows.items():
+            if bus is None or key[0] == bus:
+                I2C._stale_shadows.setdefault(key, {}).update(shadow)
+                shadow.clear()
+
+    @classmethod
+    def reset_shadow_stats(cls):
+        """Reset register shadow counters of all devices"""
+        I2C._shadow_stats.clear()
 
     def read(self, length=1):
         """Read data from I2C device
@@ -203,11 +708,52 @@ class I2C(_Basic_class):
         if not isinstance(length, int):
             raise ValueError(f"length must be int, not {type(length)}")
 
+        if hasattr(self._smbus, 'i2c_rdwr'):
+            result = self._read_block(length)
+            if result is not False:
+                return list(result)
+            return [False] * length
+
         result = []
         for _ in range(length):
             result.append(self._read_byte())
         return result
 
+    def read_bytes(self, length=1):
+        """Read data from I2C device in one block transaction
+
+        :param length: Number of bytes to receive
+        :type length: int
+        :return: Received data, or False if error
+        :rtype: bytes/False
+        """
+        if not hasattr(self._smbus, 'i2c_rdwr'):
+            result = self.read(length)
+            if False in result:
+                return False
+            return bytes(result)
+        return self._read_block(length)
+
+    def write_read(self, data, length):
+        """Write data then read from I2C device in one combined transaction
+
+        Write and read are separated by a repeated start, so no other
+        transaction can get in between. Falls back to a write and a read
+        if the bus does not support combined transactions.
+
+        :param data: Data to write
+        :type data: list/bytearray
+        :param length: Number of bytes to receive
+        :type length: int
+        :return: Received data, or False if error
+        :rtype: bytes/list/False
+        """
+        if not hasattr(self._smbus, 'i2c_rdwr'):
+            with self.transaction():
+                self.write(data)
+                return self.read(length)
+        return self._write_read(list(data), length)
+
     def mem_write(self, data, memaddr):
         """Send data to specific register address
 
@@ -255,7 +801,7 @@ class I2C(_Basic_class):
         :return: True if the I2C device is avaliable, False otherwise
         :rtype: bool
         """
-        return self.address in self.scan()
+        return self.probe(self.address)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Import time check of sim_robot_hat
+
+Times import statements in fresh interpreters and fails when one is over
+its budget or loads a heavy optional dependency:
+
+    python -m sim_robot_hat.import_time [--repeat N] [--scale X]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pyaudio', 'pygame', 'distutils', 'numpy', 'asyncio')
+"""Modules none of the checked statements may load"""
+
+CASES = {
+    'import sim_robot_hat': 30,
+    'from sim_robot_hat import PWM': 80,
+    'from sim_robot_hat import Servo, Pin, ADC': 80,
+    'from sim_robot_hat import Ultrasonic, Grayscale_Module': 80,
+}
+"""Statement -> import time budget(ms), about 4x the desktop timings, use --scale on a Raspberry Pi"""
+
+_CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+'''
+
+
+def measure(statement, repeat=5):
+    """
+    Time an import statement in fresh interpreters
+
+    :param statement: import statement
+    :type statement: str
+    :param repeat: number of interpreters, the fastest run counts
+    :type repeat: int
+    :return: (best time(s), heavy modules loaded)
+    :rtype: tuple
+    """
+    code = _CHILD.format(statement=statement, heavy=HEAVY_MODULES)
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                                text=True, check=True).stdout
+        elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+
+def main(argv=None):
+    """
+    Check all CASES
+
+    :param argv: command line arguments
+    :type argv: list
+    :return: exit code, 0 if all statements pass
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(prog='python -m sim_robot_hat.import_time')
+    parser.add_argument('--repeat', type=int, default=5, help='interpreters per statement')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply the budgets, for slower machines')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for statement, budget in CASES.items():
+        elapsed, loaded = measure(statement, args.repeat)
+        budget *= args.scale
+        ok = elapsed * 1000 <= budget and not loaded
+        failed |= not ok
+        note = f", loads {', '.join(loaded)}" if loaded else ''
+        print(f"{'ok' if ok else 'FAIL':>4} {elapsed * 1000:7.1f} ms (budget {budget:.0f} ms{note})  {statement}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,12 +5,26 @@ from .adc import ADC
 from .i2c import I2C
 import time
 from .basic import _Basic_class
+from .utils import _import_numpy
+import threading
 from typing import Union, List, Tuple, Optional
 
 class Ultrasonic():
     SOUND_SPEED = 343.3 # ms
 
-    def __init__(self, trig, echo, timeout=0.02):
+    def __init__(self, trig, echo, timeout=0.02, edge_capture=False):
+        """
+        Initialize ultrasonic sensor
+
+        :param trig: trigger pin
+        :type trig: robot_hat.Pin
+        :param echo: echo pin
+        :type echo: robot_hat.Pin
+        :param timeout: max time to wait for an echo(s)
+        :type timeout: float
+        :param edge_capture: time the echo with edge callbacks instead of polling, see edge_capture()
+        :type edge_capture: bool
+        """
         if not isinstance(trig, Pin):
             raise TypeError("trig must be robot_hat.Pin object")
         if not isinstance(echo, Pin):
@@ -23,23 +37,74 @@ class Ultrasonic():
         self.trig = Pin(trig._pin_num)
         self.echo = Pin(echo._pin_num, mode=Pin.IN, pull=Pin.PULL_DOWN)
 
-    def _read(self):
+        self._edge_capture = False
+        self._pulse_start = None
+        self._pulse_end = None
+        self._echo_done = threading.Event()
+        if edge_capture:
+            self.edge_capture(True)
+
+    def edge_capture(self, enable=True):
+        """
+        Enable or disable edge capture mode
+
+        In edge capture mode the echo edges are timestamped by gpio callbacks
+        and read() sleeps until the falling edge, instead of spinning on the
+        echo pin, so ranging does not keep a cpu core busy.
+
+        :param enable: True to enable edge capture
+        :type enable: bool
+        """
+        gpio = self.echo.gpio
+        if enable:
+            gpio.when_activated = self._on_echo_rising
+            gpio.when_deactivated = self._on_echo_falling
+        else:
+            gpio.when_activated = None
+            gpio.when_deactivated = None
+        self._edge_capture = enable
+
+    def _on_echo_rising(self):
+        self._pulse_start = time.perf_counter()
+
+    def _on_echo_falling(self):
+        if self._pulse_start is not None:
+            self._pulse_end = time.perf_counter()
+            self._echo_done.set()
+
+    def _trigger(self):
         self.trig.off()
         time.sleep(0.001)
         self.trig.on()
         time.sleep(0.00001)
         self.trig.off()
 
+    def _read_edge(self):
+        self._pulse_start = None
+        self._pulse_end = None
+        self._echo_done.clear()
+        self._trigger()
+        if not self._echo_done.wait(self.timeout):
+            return -1
+        during = self._pulse_end - self._pulse_start
+        cm = round(during * self.SOUND_SPEED / 2 * 100, 2)
+        return cm
+
+    def _read(self):
+        if self._edge_capture:
+            return self._read_edge()
+        self._trigger()
+
         pulse_end = 0
         pulse_start = 0
-        timeout_start = time.time()
+        timeout_start = time.perf_counter()
 
         while self.echo.gpio.value == 0:
-            pulse_start = time.time()
+            pulse_start = time.perf_counter()
             if pulse_start - timeout_start > self.timeout:
                 return -1
         while self.echo.gpio.value == 1:
-            pulse_end = time.time()
+            pulse_end = time.perf_counter()
             if pulse_end - timeout_start > self.timeout:
                 return -1
         if pulse_start == 0 or pulse_end == 0:
@@ -250,6 +315,55 @@ class Buzzer():
             time.sleep(duration/2)
 
 
+def hysteresis_mask(samples, reference, band: float = 0, initial: bool = False):
+    """
+    Threshold samples with hysteresis, vectorized
+
+    A channel turns on when its value is <= reference - band, turns off
+    when it is > reference + band, and keeps its state in between.
+
+    :param samples: N x channels array of samples, oldest first
+    :type samples: numpy.ndarray/list
+    :param reference: threshold of each channel
+    :type reference: list
+    :param band: hysteresis half width, 0 for plain thresholding(value <= reference)
+    :type band: float
+    :param initial: state before the first sample
+    :type initial: bool
+    :return: N x channels bool array
+    :rtype: numpy.ndarray
+    """
+    np = _import_numpy()
+    samples = np.asarray(samples, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    on = samples <= reference - band
+    decided = on | (samples > reference + band)
+    if decided.all():
+        return on
+    # Index of the last decided sample at or before each sample, -1 if none
+    rows = np.arange(len(samples))[:, None]
+    last = np.maximum.accumulate(np.where(decided, rows, -1), axis=0)
+    state = np.take_along_axis(on, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, state, initial)
+
+
+def mask_transitions(mask):
+    """
+    Find state changes of a mask
+
+    :param mask: N x channels or N bool array, oldest first
+    :type mask: numpy.ndarray
+    :return: K x 3 array of [sample index, channel, new state], or K x 2 of [sample index, new state] for a 1-D mask
+    :rtype: numpy.ndarray
+    """
+    np = _import_numpy()
+    mask = np.asarray(mask)
+    changes = np.argwhere(mask[1:] != mask[:-1])
+    changes[:, 0] += 1
+    states = mask[tuple(changes.T)].astype(int)
+    return np.column_stack((changes, states))
+
+
 class Grayscale_Module(object):
     """3 channel Grayscale Module"""
 
@@ -279,6 +393,8 @@ class Grayscale_Module(object):
         for i, pin in enumerate(self.pins):
             if not isinstance(pin, ADC):
                 raise TypeError(f"pin{i} must be robot_hat.ADC")
+        # All channels on one ADC device can be read in one burst
+        self._same_device = len({(pin._bus, pin.address) for pin in self.pins}) == 1
         self._reference = self.REFERENCE_DEFAULT
 
     def reference(self, ref: list = None) -> list:
@@ -312,6 +428,23 @@ class Grayscale_Module(object):
             datas = self.read()
         return [0 if data > self._reference[i] else 1 for i, data in enumerate(datas)]
 
+    def read_status_batch(self, samples, hysteresis: float = 0) -> tuple:
+        """
+        Line status of many samples at once, e.g. a window of ADCSampler
+
+        :param samples: N x 3 array of grayscale datas, oldest first
+        :type samples: numpy.ndarray/list
+        :param hysteresis: hysteresis half width around the reference, 0 for the same result as read_status()
+        :type hysteresis: float
+        :return: (N x 3 array of line status, 0 for white, 1 for black;
+                  K x 3 array of transitions, [sample index, channel, new status])
+        :rtype: tuple
+        """
+        if self._reference == None:
+            raise ValueError("Reference value is not set")
+        status = hysteresis_mask(samples, self._reference, hysteresis).astype('uint8')
+        return status, mask_transitions(status)
+
     def read(self, channel: int = None) -> list:
         """
         read a channel or all datas
@@ -322,6 +455,138 @@ class Grayscale_Module(object):
         :rtype: list
         """
         if channel == None:
+            if self._same_device:
+                return self.pins[0].read_many(self.pins)
             return [self.pins[i].read() for i in range(3)]
         else:
             return self.pins[channel].read()
+
+
+class RangingService():
+    """
+    Background ultrasonic ranging
+
+    A thread owns the Ultrasonic sensor and pings at a fixed rate, never
+    faster than MIN_PING_INTERVAL so echoes of the last ping have died
+    out. Readings are median filtered and outliers rejected, and the
+    latest distance is published with its timestamp, so control loops
+    read it without waiting for an echo.
+    """
+
+    MIN_PING_INTERVAL = 0.06
+    """Min time between two pings(s), 60ms measurement cycle of HC-SR04"""
+
+    def __init__(self, ultrasonic: Ultrasonic, rate: float = 10, window: int = 5,
+                 max_jump: float = 50.0, max_outliers: int = 3):
+        """
+        Initialize ranging service
+
+        :param ultrasonic: ultrasonic sensor
+        :type ultrasonic: robot_hat.Ultrasonic
+        :param rate: pings per second
+        :type rate: float
+        :param window: number of readings of the median filter
+        :type window: int
+        :param max_jump: readings further than this from the median are outliers(cm)
+        :type max_jump: float
+        :param max_outliers: accept outliers after this many in a row, the distance really changed
+        :type max_outliers: int
+        """
+        # duck typed, so a robot_hat.Ultrasonic of the real board works too
+        if not callable(getattr(ultrasonic, 'read', None)):
+            raise TypeError("ultrasonic must be robot_hat.Ultrasonic object")
+        self.ultrasonic = ultrasonic
+        self.interval = max(1.0 / rate, self.MIN_PING_INTERVAL)
+        self.window = window
+        self.max_jump = max_jump
+        self.max_outliers = max_outliers
+        self._readings = []
+        self._outliers = 0
+        self._latest = (-1, 0.0)
+        self._thread = None
+        self._running = threading.Event()
+        self.pings = 0
+        """Number of pings"""
+        self.rejected = 0
+        """Number of readings rejected as timeout or outlier"""
+
+    def start(self):
+        """Start ranging in background"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._loop, name="RangingService", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop ranging"""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """
+        Check if ranging is running
+
+        :return: True if running
+        :rtype: bool
+        """
+        return self._running.is_set()
+
+    def _loop(self):
+        next_time = time.monotonic()
+        while self._running.is_set():
+            self._update(self.ultrasonic.read(1))
+            next_time += self.interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Overrun, restart the schedule instead of pinging back to back
+                next_time = time.monotonic()
+
+    def _update(self, distance: float):
+        self.pings += 1
+        if distance < 0:
+            self.rejected += 1
+            return
+        readings = self._readings
+        if len(readings) >= self.window:
+            median = sorted(readings)[len(readings) // 2]
+            if abs(distance - median) > self.max_jump:
+                self._outliers += 1
+                if self._outliers < self.max_outliers:
+                    self.rejected += 1
+                    return
+                # Consistent jump, start over from the new distance
+                readings.clear()
+        self._outliers = 0
+        readings.append(distance)
+        if len(readings) > self.window:
+            readings.pop(0)
+        median = sorted(readings)[len(readings) // 2]
+        self._latest = (median, time.monotonic())
+
+    def read(self, max_age: float = None) -> float:
+        """
+        Get the latest filtered distance
+
+        :param max_age: max age of the distance(s), None for any age
+        :type max_age: float
+        :return: distance(cm), -1 if there is no distance yet or it is too old
+        :rtype: float
+        """
+        distance, timestamp = self._latest
+        if max_age is not None and time.monotonic() - timestamp > max_age:
+            return -1
+        return distance
+
+    def latest(self) -> Tuple[float, float]:
+        """
+        Get the latest filtered distance and its timestamp
+
+        :return: (distance(cm), time.monotonic() timestamp), distance is -1 if there is no distance yet
+        :rtype: tuple
+        """
+        return self._latest
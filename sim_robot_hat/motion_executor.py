@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+import threading
+from collections import deque
+from concurrent.futures import Future
+from .utils import _import_numpy
+
+
+class MotionExecutor(object):
+    """
+    Background servo motion executor for Robot
+
+    Moves are queued and played on a worker thread, so the caller returns
+    at once with a concurrent.futures.Future. The future resolves to True
+    when the move completed, or False when a later move preempted it.
+    A move can wait in the queue, preempt the move in flight, or blend
+    into it over a few steps for a smooth change of direction.
+
+        executor = MotionExecutor(robot)
+        executor.move([30, -30, 0], speed=80)
+        done = await executor.move_async([0, 0, 0], mode='blend')
+
+    Requires numpy.
+    """
+
+    MODES = ('queue', 'preempt', 'blend')
+    """queue: run after the queued moves, preempt: drop the queued moves and
+    stop the move in flight, blend: like preempt, but fade from the move in
+    flight into the new one over blend_steps steps"""
+
+    def __init__(self, robot, blend_steps=10):
+        """
+        Initialize the executor and start its worker thread
+
+        :param robot: robot to move
+        :type robot: Robot
+        :param blend_steps: number of steps of a blend
+        :type blend_steps: int
+        """
+        _import_numpy()
+        self.robot = robot
+        self.blend_steps = blend_steps
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._interrupt = False
+        self._closed = False
+        self._remaining = None
+        self._thread = threading.Thread(target=self._loop, name="MotionExecutor", daemon=True)
+        self._thread.start()
+
+    def move(self, targets, speed=50, bpm=None, profile='linear', mode='queue'):
+        """
+        Queue a move
+
+        :param targets: list of servo angles
+        :type targets: list
+        :param speed: speed of servo move
+        :type speed: int or float
+        :param bpm: beats per minute
+        :type bpm: int or float
+        :param profile: 'linear', 'ease' or 'trapezoid'
+        :type profile: str
+        :param mode: one of MODES
+        :type mode: str
+        :return: future, True if the move completed, False if it was preempted
+        :rtype: concurrent.futures.Future
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode: {mode}, use one of {self.MODES}")
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MotionExecutor is closed")
+            if mode != 'queue':
+                self._cancel_queued()
+                self._interrupt = self._busy
+            self._queue.append((list(targets), speed, bpm, profile, mode, future))
+            self._cond.notify_all()
+        return future
+
+    async def move_async(self, *args, **kwargs):
+        """
+        Queue a move and wait for it without blocking the event loop,
+        same arguments as move()
+
+        :return: True if the move completed, False if it was preempted
+        :rtype: bool
+        """
+        import asyncio
+        return await asyncio.wrap_future(self.move(*args, **kwargs))
+
+    def do_action(self, motion_name, step=1, speed=50, mode='queue'):
+        """
+        Queue all keyframes of a preset action of the robot
+
+        :param motion_name: motion, key of robot.move_list
+        :type motion_name: str
+        :param step: step of motion
+        :type step: int
+        :param speed: speed of motion
+        :type speed: int or float
+        :param mode: mode of the first keyframe, the others are queued after it
+        :type mode: str
+        :return: future of the last keyframe
+        :rtype: concurrent.futures.Future
+        """
+        future = None
+        for _ in range(step):
+            for motion in self.robot.move_list[motion_name]:
+                future = self.move(motion, speed, mode=mode)
+                mode = 'queue'
+        return future
+
+    def stop(self):
+        """Drop the queued moves and stop the move in flight where it is"""
+        with self._cond:
+            self._cancel_queued()
+            self._interrupt = self._busy
+            self._cond.notify_all()
+
+    def _cancel_queued(self):
+        # called with self._cond held
+        for *_, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+
+    def is_busy(self):
+        """
+        Check if a move is running or queued
+
+        :return: True if busy
+        :rtype: bool
+        """
+        with self._cond:
+            return self._busy or bool(self._queue)
+
+    def wait(self, timeout=None):
+        """
+        Wait until all queued moves are done
+
+        :param timeout: timeout(s), None to wait forever
+        :type timeout: float
+        :return: True if idle, False on timeout
+        :rtype: bool
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy and not self._queue, timeout)
+
+    def close(self):
+        """Stop moving and end the worker thread"""
+        with self._cond:
+            self._closed = True
+            self._cancel_queued()
+            self._interrupt = self._busy
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _should_stop(self):
+        return self._interrupt
+
+    def _blend(self, old, new):
+        np = _import_numpy()
+        n = min(self.blend_steps, len(old), len(new))
+        if n == 0:
+            return new
+        weight = (np.arange(1, n + 1) / n)[:, None]
+        blended = old[:n] * (1 - weight) + new[:n] * weight
+        return np.vstack((blended, new[n:]))
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                if not self._queue:
+                    self._busy = False
+                    self._cond.notify_all()
+                    return
+                targets, speed, bpm, profile, mode, future = self._queue.popleft()
+                self._busy = True
+                self._interrupt = False
+                remaining, self._remaining = self._remaining, None
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                angles = self.robot.plan_move(targets, speed, bpm, profile)
+                if angles is None:
+                    future.set_result(True)
+                    continue
+                if mode == 'blend' and remaining is not None:
+                    angles = self._blend(remaining, angles)
+                written = self.robot.play_trajectory(angles, self._should_stop)
+                if written < len(angles):
+                    with self._cond:
+                        # keep the rest of the move only for a blend that preempted it
+                        if self._queue and self._queue[0][4] == 'blend':
+                            self._remaining = angles[written:]
+                    future.set_result(False)
+                else:
+                    future.set_result(True)
+            except Exception as e:
+                future.set_exception(e)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from .basic import _Basic_class
+from .sim_mcu import board as sim_board
 # import gpiozero  # https://gpiozero.readthedocs.io/en/latest/installing.html
 # from gpiozero import OutputDevice, InputDevice, Button
 
@@ -123,6 +124,8 @@ class Pin(_Basic_class):
         if self.gpio != None:
             if self.gpio.pin != None:
                 self.gpio.close()
+        # Simulated gpio instead of gpiozero devices
+        self.gpio = sim_board.gpio(self._pin_num, mode, pull)
         #
         # if mode in [None, self.OUT]:
         #     self.gpio = OutputDevice(self._pin_num)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import time
+
+
+class PowerUpScheduler(object):
+    """
+    Staged servo power-up
+
+    A servo that gets its first pulse jumps to the angle at full stall
+    current. Bringing all servos up at once can pull the supply down and
+    reset the Raspberry Pi, so servos are brought up in groups that fit a
+    current budget, with a settle time between groups. Each group is one
+    batched PWM write. The timeline of the last run is kept for reporting.
+
+        scheduler = PowerUpScheduler(supply='battery')
+        scheduler.run(servos, [0] * len(servos))
+        print(scheduler.report())
+    """
+
+    SUPPLIES = {
+        'battery': {'budget': 3.0, 'inrush': 0.75, 'settle': 0.1},
+        'usb': {'budget': 1.0, 'inrush': 0.75, 'settle': 0.15},
+        'bench': {'budget': 5.0, 'inrush': 0.75, 'settle': 0.05},
+    }
+    """Presets per supply, budget and inrush in A, settle in s. battery is
+    the Robot HAT 5V regulator on 2 x 18650, usb is a Pi powered from USB
+    only, bench is a lab supply"""
+
+    def __init__(self, budget=None, inrush=None, settle=None, supply='battery'):
+        """
+        Initialize the scheduler, arguments left as None come from the supply preset
+
+        :param budget: current the supply can spare for servo inrush(A)
+        :type budget: float
+        :param inrush: stall current of one servo(A)
+        :type inrush: float
+        :param settle: time for a group to reach its angle and the supply to recover(s)
+        :type settle: float
+        :param supply: preset name, key of SUPPLIES
+        :type supply: str
+        """
+        if supply not in self.SUPPLIES:
+            raise ValueError(f"Unknown supply: {supply}, use one of {list(self.SUPPLIES)}")
+        preset = self.SUPPLIES[supply]
+        self.budget = preset['budget'] if budget is None else budget
+        self.inrush = preset['inrush'] if inrush is None else inrush
+        self.settle = preset['settle'] if settle is None else settle
+        self.timeline = []
+        """(time from start(s), servo indexes) of each group of the last run"""
+        self.duration = 0.0
+        """Duration of the last run(s)"""
+
+    def group_size(self):
+        """
+        Get the number of servos that may start together
+
+        :return: servos per group, at least 1
+        :rtype: int
+        """
+        return max(1, int(self.budget // self.inrush))
+
+    def plan(self, count, order=None):
+        """
+        Split servos into power-up groups
+
+        :param count: number of servos
+        :type count: int
+        :param order: servo indexes in power-up order, default 0 to count - 1
+        :type order: list
+        :return: list of groups, each a list of servo indexes
+        :rtype: list
+        """
+        order = list(range(count)) if order is None else list(order)
+        size = self.group_size()
+        return [order[i:i + size] for i in range(0, len(order), size)]
+
+    def run(self, servos, angles, offsets=None, order=None):
+        """
+        Power up servos group by group, blocking until the last group is written.
+        There is no wait after the last group, nothing else is staged behind it.
+
+        :param servos: servos, all on one device, robot_hat servos are written one by one
+        :type servos: list
+        :param angles: initial angle of each servo
+        :type angles: list
+        :param offsets: calibration offset of each servo, added to the angle
+        :type offsets: list
+        :param order: servo indexes in power-up order, default the servos order
+        :type order: list
+        :return: timeline, (time from start(s), servo indexes) of each group
+        :rtype: list
+        """
+        if offsets is None:
+            offsets = [0] * len(servos)
+        self.timeline = []
+        start = time.monotonic()
+        deadline = start
+        for i, group in enumerate(self.plan(len(servos), order)):
+            if i > 0:
+                deadline += self.settle
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.timeline.append((time.monotonic() - start, group))
+            if hasattr(servos[group[0]], 'write_many'):
+                servos[group[0]].write_many(
+                    {servos[j]: servos[j].angle_to_pulse_width(angles[j] + offsets[j]) for j in group})
+            else:
+                # robot_hat servos, one write per servo
+                for j in group:
+                    servos[j].angle(angles[j] + offsets[j])
+        self.duration = time.monotonic() - start
+        return self.timeline
+
+    def report(self):
+        """
+        Get the timeline of the last run as readable text
+
+        :return: report
+        :rtype: str
+        """
+        lines = [f"power-up: {len(self.timeline)} groups of up to {self.group_size()} servos "
+                 f"({self.budget}A budget, {self.inrush}A inrush, {self.settle * 1000:.0f}ms settle), "
+                 f"{self.duration * 1000:.1f}ms"]
+        for at, group in self.timeline:
+            lines.append(f"  {at * 1000:7.1f}ms servos {group}")
+        return '\n'.join(lines)
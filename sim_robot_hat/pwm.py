@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import math
 from .i2c import I2C
+from .bus_scheduler import BusScheduler
 
 timer = [{"arr": 1}] * 7
 
@@ -20,6 +21,9 @@ class PWM(I2C):
 
     ADDR = [0x14, 0x15, 0x16]
 
+    PRIORITY = BusScheduler.PRIORITY_HIGH
+    """Motor and servo writes go before telemetry reads"""
+
     CLOCK = 72000000.0
     """Clock frequency"""
 
@@ -61,9 +65,51 @@ class PWM(I2C):
         self.freq(50)
 
     def _i2c_write(self, reg, value):
-        value_h = value >> 8
-        value_l = value & 0xff
-        self.write([reg, value_h, value_l])
+        self.shadow_write(reg, value)
+
+    def write_many(self, pulse_widths, percent=False, force=False):
+        """
+        Set pulse width of several channels on this device at once,
+        consecutive channels are merged into one block transaction
+
+        :param pulse_widths: channel -> pulse width, channel can be a number, "P<n>" or a PWM object
+        :type pulse_widths: dict
+        :param percent: values are pulse width percentage(0-100) instead of pulse width
+        :type percent: bool
+        :param force: write even if the values are unchanged
+        :type force: bool
+        :return: False if any write failed
+        :rtype: bool/None
+        """
+        values = {}
+        for channel, value in pulse_widths.items():
+            pwm = channel if isinstance(channel, PWM) else None
+            if pwm is not None:
+                channel = pwm.channel
+            elif isinstance(channel, str):
+                channel = int(channel[1:])
+            if percent:
+                if pwm is not None:
+                    pwm._pulse_width_percent = value
+                value = self.percent_to_pulse_width(value)
+            value = int(value)
+            if pwm is not None:
+                pwm._pulse_width = value
+            elif channel == self.channel:
+                self._pulse_width = value
+            values[self.REG_CHN + channel] = value
+        return self.shadow_write_many(values, force=force)
+
+    def percent_to_pulse_width(self, pulse_width_percent):
+        """
+        Get the pulse width of a pulse width percentage, without writing it
+
+        :param pulse_width_percent: pulse width percentage(0-100)
+        :type pulse_width_percent: float
+        :return: pulse width
+        :rtype: int
+        """
+        return int(pulse_width_percent / 100.0 * timer[self.timer]["arr"])
 
     def freq(self, freq=None):
         """
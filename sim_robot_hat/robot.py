@@ -2,7 +2,10 @@
 from .basic import _Basic_class
 from .pwm import PWM
 from .servo import Servo
+from .power_up import PowerUpScheduler
+from . import trajectory
 import time
+from collections import OrderedDict
 from .filedb import fileDB
 import os
 
@@ -40,7 +43,13 @@ class Robot(_Basic_class):
     # max_dps = 500
     """Servo max Degree Per Second"""
 
-    def __init__(self, pin_list, db=config_file, name=None, init_angles=None, init_order=None, **kwargs):
+    step_time = 10  # ms
+    """Time between servo updates of a move"""
+
+    ACTION_CACHE_SIZE = 32
+    """Number of compiled actions kept by compile_action()"""
+
+    def __init__(self, pin_list, db=config_file, name=None, init_angles=None, init_order=None, power_up=None, **kwargs):
         """
         Initialize the robot class
 
@@ -52,9 +61,10 @@ class Robot(_Basic_class):
         :type name: str
         :param init_angles: list of initial angles
         :type init_angles: list
-        :param init_order: list of initialization order(Servos will init one by one in case of sudden huge current, pulling down the power supply voltage. default order is the pin list. in some cases, you need different order, use this parameter to set it.)
+        :param init_order: list of initialization order(Servos init in groups in case of sudden huge current, pulling down the power supply voltage. default order is the pin list. in some cases, you need different order, use this parameter to set it.)
         :type init_order: list
-        :type init_angles: list
+        :param power_up: servo power-up scheduler, default PowerUpScheduler() for the battery supply, see power_up_report()
+        :type power_up: PowerUpScheduler
         """
         super().__init__(**kwargs)
         self.servo_list = []
@@ -91,11 +101,23 @@ class Robot(_Basic_class):
         for i, pin in enumerate(pin_list):
             self.servo_list.append(Servo(pin))
             self.servo_positions[i] = init_angles[i]
-        for i in init_order:
-            self.servo_list[i].angle(self.offset[i]+self.servo_positions[i])
-            time.sleep(0.15)
+        if power_up is None:
+            power_up = PowerUpScheduler()
+        self.power_up = power_up
+        self.power_up.run(self.servo_list, self.servo_positions, self.offset, init_order)
 
         self.last_move_time = time.time()
+        self._writer = None
+        self._actions = OrderedDict()
+
+    def power_up_report(self):
+        """
+        Get the servo power-up timeline of the initialization
+
+        :return: report
+        :rtype: str
+        """
+        return self.power_up.report()
 
     def new_list(self, default_value):
         """
@@ -121,35 +143,116 @@ class Robot(_Basic_class):
 
     def servo_write_all(self, angles):
         """
-        Set servo angles to specific angles with original angle and offset
+        Set servo angles to specific angles with original angle and offset,
+        through the servo lookup tables
 
         :param angles: list of servo angles
         :type angles: list
         """
-        rel_angles = []  # ralative angle to home
-        for i in range(self.pin_num):
-            rel_angles.append(
-                self.direction[i] * (self.origin_positions[i] + angles[i] + self.offset[i]))
-        self.servo_write_raw(rel_angles)
+        for i, servo in enumerate(self.servo_list):
+            servo.fast_angle(angles[i], self.origin_positions[i] + self.offset[i], self.direction[i])
+
+    def _move_time(self, max_delta, speed, bpm, peak_factor=1.0):
+        # total move time(ms), stretched so the fastest step stays under max_dps
+        speed = min(100, max(0, speed))
+        if bpm: # bpm: beats per minute
+            total_time = 60 / bpm * 1000 # time taken per beat, unit: ms
+        else:
+            total_time = -9.9 * speed + 1000 # time spent in one step, unit: ms
+        current_max_dps = max_delta * peak_factor / total_time * 1000
+        if current_max_dps > self.max_dps:
+            total_time = max_delta * peak_factor / self.max_dps * 1000
+        return total_time
+
+    def plan_move(self, targets, speed=50, bpm=None, profile='linear', start=None):
+        """
+        Precompute a move from the current angles to targets, requires numpy
+
+        :param targets: list of servo angles
+        :type targets: list
+        :param speed: speed of servo move
+        :type speed: int or float
+        :param bpm: beats per minute
+        :type bpm: int or float
+        :param profile: 'linear', 'ease' or 'trapezoid', see trajectory.progress()
+        :type profile: str
+        :param start: angles to start from, default the current angles
+        :type start: list
+        :return: steps x servos array of angles, None if there is nothing to move
+        :rtype: numpy.ndarray
+        """
+        if start is None:
+            start = self.servo_positions
+        max_delta = max(abs(t - p) for t, p in zip(targets, start))
+        max_delta = int(max_delta)
+        if max_delta == 0:
+            return None
+        total_time = self._move_time(max_delta, speed, bpm,
+                                     trajectory.peak_velocity_factor(profile))
+        steps = max(1, int(total_time / self.step_time))
+        return trajectory.plan(start, targets, steps, profile)
+
+    def _trajectory_writer(self):
+        if self._writer is None:
+            self._writer = trajectory.TrajectoryWriter(self.servo_list, self.step_time / 1000)
+        return self._writer
+
+    def play_trajectory(self, angles, should_stop=None):
+        """
+        Write a planned move, one row every step_time, blocking until done
+
+        :param angles: steps x servos array of angles, from plan_move()
+        :type angles: numpy.ndarray
+        :param should_stop: checked after each step, return True to stop the move there
+        :type should_stop: callable
+        :return: number of steps written
+        :rtype: int
+        """
+        writer = self._trajectory_writer()
+        offsets = [o + p for o, p in zip(self.origin_positions, self.offset)]
+        words = writer.words(angles, offsets, self.direction)
+        rows = angles.tolist()
+
+        def on_step(index):
+            self.servo_positions = rows[index]
+            return should_stop is not None and should_stop()
 
-    def servo_move(self, targets, speed=50, bpm=None):
+        return writer.play(words, on_step)
+
+    def servo_move(self, targets, speed=50, bpm=None, profile='linear'):
         """
         Move servo to specific angles with speed or bpm
 
+        The whole move is precomputed with numpy and streamed with batched
+        writes, without numpy it falls back to stepping linearly in python.
+
         :param targets: list of servo angles
         :type targets: list
         :param speed: speed of servo move
         :type speed: int or float
         :param bpm: beats per minute
         :type bpm: int or float
+        :param profile: 'linear', 'ease' or 'trapezoid', see trajectory.progress()
+        :type profile: str
         """
+        try:
+            angles = self.plan_move(targets, speed, bpm, profile)
+        except ImportError:
+            self._servo_move_steps(targets, speed, bpm)
+            return
+        if angles is None:
+            time.sleep(self.step_time/1000)
+            return
+        self.play_trajectory(angles)
+
+    def _servo_move_steps(self, targets, speed=50, bpm=None):
         '''
             calculate the max delta angle, multiply by 2 to define a max_step
             loop max_step times, every servo add/minus 1 when step reaches its adder_flag
         '''
         speed = max(0, speed)
         speed = min(100, speed)
-        step_time = 10  # ms 
+        step_time = self.step_time  # ms
         delta = []
         absdelta = []
         max_step = 0
@@ -191,7 +294,7 @@ class Robot(_Basic_class):
             total_time = max_delta / self.max_dps * 1000
             # print(f"New Total time: {total_time} ms")
         # calculate max step
-        max_step = int(total_time / step_time)
+        max_step = max(1, int(total_time / step_time))
 
         # Calculate all step-angles for each servo
         for i in range(self.pin_num):
@@ -232,9 +335,76 @@ class Robot(_Basic_class):
         :param speed: speed of motion
         :type speed: int or float
         """
-        for _ in range(step):
-            for motion in self.move_list[motion_name]:
-                self.servo_move(motion, speed)
+        try:
+            body, wrap = self.compile_action(motion_name, speed)
+        except ImportError:
+            for _ in range(step):
+                for motion in self.move_list[motion_name]:
+                    self.servo_move(motion, speed)
+            return
+        motions = self.move_list[motion_name]
+        # The move to the first keyframe depends on where the servos are, so it is not compiled
+        self.servo_move(motions[0], speed)
+        for i in range(step):
+            if i > 0:
+                wrap.play()
+            body.play()
+            self.servo_positions = list(motions[-1])
+
+    def _compile_moves(self, start, motions, speed):
+        # one Timeline for the moves from start through motions, writing only changed channels
+        np = trajectory._import_numpy()
+        if not motions:
+            return trajectory.Timeline(self.servo_list[0], [], 0)
+        rows = []
+        for motion in motions:
+            angles = self.plan_move(motion, speed, start=start)
+            if angles is None:
+                # nothing to move, hold for one step like servo_move()
+                angles = np.asarray([start], dtype=float)
+            rows.append(angles)
+            start = motion
+        writer = self._trajectory_writer()
+        offsets = [o + p for o, p in zip(self.origin_positions, self.offset)]
+        words = writer.words(np.vstack(rows), offsets, self.direction).tolist()
+        step_time = self.step_time / 1000
+        events = []
+        last = [None] * self.pin_num
+        for index, row in enumerate(words):
+            changed = {servo: word for servo, word, old in zip(self.servo_list, row, last) if word != old}
+            events.append((index * step_time, changed, ()))
+            last = row
+        return trajectory.Timeline(self.servo_list[0], events, len(words) * step_time)
+
+    def compile_action(self, motion_name, speed=50):
+        """
+        Compile a preset action into register write timelines, requires numpy.
+        Compiled actions are cached by action, speed and calibration,
+        the least recently used ones are dropped beyond ACTION_CACHE_SIZE.
+
+        :param motion_name: motion, key of move_list
+        :type motion_name: str
+        :param speed: speed of motion
+        :type speed: int or float
+        :return: (timeline from the first to the last keyframe, timeline from the last back to the first keyframe)
+        :rtype: tuple
+        """
+        motions = self.move_list[motion_name]
+        key = (motion_name, speed, tuple(self.origin_positions), tuple(self.offset), tuple(self.direction))
+        compiled = self._actions.get(key)
+        if compiled is not None:
+            self._actions.move_to_end(key)
+            return compiled
+        compiled = (self._compile_moves(motions[0], motions[1:], speed),
+                    self._compile_moves(motions[-1], motions[:1], speed))
+        self._actions[key] = compiled
+        while len(self._actions) > self.ACTION_CACHE_SIZE:
+            self._actions.popitem(last=False)
+        return compiled
+
+    def clear_action_cache(self):
+        """Drop all compiled actions, needed after editing move_list in place"""
+        self._actions.clear()
 
     def set_offset(self, offset_list):
         """
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 from .pwm import PWM
-from .utils import mapping
+from .utils import mapping, _import_numpy
 
 
 class Servo(PWM):
@@ -9,6 +9,8 @@ class Servo(PWM):
     MIN_PW = 500
     FREQ = 50
     PERIOD = 4095
+    LUT_RESOLUTION = 0.1
+    """Angle step of the lookup table used by fast_angle(), degree"""
 
     def __init__(self, channel, address=None, *args, **kwargs):
         """
@@ -21,6 +23,8 @@ class Servo(PWM):
         self.period(self.PERIOD)
         prescaler = self.CLOCK / self.FREQ / self.PERIOD
         self.prescaler(prescaler)
+        self._lut = None
+        self._lut_key = None
 
     def angle(self, angle):
         """
@@ -58,3 +62,136 @@ class Servo(PWM):
         value = int(pwr * self.PERIOD)
         self._debug(f"pulse width value: {value}")
         self.pulse_width(value)
+
+    def angle_to_pulse_width(self, angle):
+        """
+        Get the pulse width register value of an angle, without writing it
+
+        :param angle: angle(-90~90)
+        :type angle: float
+        :return: pulse width, as angle() would write it
+        :rtype: int
+        """
+        angle = max(-90, min(90, angle))
+        pulse_width_time = mapping(angle, -90, 90, self.MIN_PW, self.MAX_PW)
+        pulse_width_time = max(self.MIN_PW, min(self.MAX_PW, pulse_width_time))
+        return int(pulse_width_time / 20000 * self.PERIOD)
+
+    def build_lut(self, offset=0, direction=1, resolution=None):
+        """
+        Precompute pulse width register values for fast_angle()
+
+        Entry i holds angle_to_pulse_width(direction * (angle + offset)) for
+        angle = -90 - offset + i * resolution, so the calibration offset
+        and direction are baked in and every commanded angle, including the
+        ones clamped at -90/90, maps to a table entry.
+
+        :param offset: calibration offset, added to the angle
+        :type offset: float
+        :param direction: 1 or -1, multiplied after adding the offset
+        :type direction: int
+        :param resolution: angle step, default LUT_RESOLUTION
+        :type resolution: float
+        """
+        if resolution is None:
+            resolution = self.LUT_RESOLUTION
+        size = int(round(180 / resolution)) + 1
+        self._lut = [self.angle_to_pulse_width(direction * (-90 + i * resolution))
+                     for i in range(size)]
+        self._lut_array = None
+        self._lut_min = -90 - offset
+        self._lut_scale = 1 / resolution
+        self._lut_key = (offset, direction)
+
+    def angle_word(self, angle, offset=0, direction=1):
+        """
+        Get the pulse width register value of an angle from the lookup table,
+        the table is rebuilt if offset or direction changed
+
+        :param angle: angle
+        :type angle: float
+        :param offset: calibration offset, added to the angle
+        :type offset: float
+        :param direction: 1 or -1, multiplied after adding the offset
+        :type direction: int
+        :return: pulse width, angle_to_pulse_width(direction * (angle + offset)) rounded to the table resolution
+        :rtype: int
+        """
+        if self._lut_key != (offset, direction):
+            self.build_lut(offset, direction)
+        lut = self._lut
+        index = int((angle - self._lut_min) * self._lut_scale + 0.5)
+        if index < 0:
+            index = 0
+        elif index >= len(lut):
+            index = len(lut) - 1
+        return lut[index]
+
+    def angle_words(self, angles, offset=0, direction=1):
+        """
+        Vectorized angle_word() for many angles at once, requires numpy
+
+        :param angles: angles
+        :type angles: numpy.ndarray/list
+        :param offset: calibration offset, added to the angle
+        :type offset: float
+        :param direction: 1 or -1, multiplied after adding the offset
+        :type direction: int
+        :return: array of pulse widths
+        :rtype: numpy.ndarray
+        """
+        np = _import_numpy()
+        if self._lut_key != (offset, direction):
+            self.build_lut(offset, direction)
+        if self._lut_array is None:
+            self._lut_array = np.array(self._lut, dtype=np.int64)
+        index = ((np.asarray(angles, dtype=float) - self._lut_min) * self._lut_scale + 0.5).astype(np.int64)
+        return self._lut_array[np.clip(index, 0, len(self._lut) - 1)]
+
+    def fast_angle(self, angle, offset=0, direction=1):
+        """
+        Set the angle of the servo motor through the lookup table, skipping
+        the checks and debug output of angle()
+
+        :param angle: angle
+        :type angle: float
+        :param offset: calibration offset, added to the angle
+        :type offset: float
+        :param direction: 1 or -1, multiplied after adding the offset
+        :type direction: int
+        """
+        self._pulse_width = self.angle_word(angle, offset, direction)
+        self._i2c_write(self.REG_CHN + self.channel, self._pulse_width)
+
+
+def benchmark(iterations=10000):
+    """
+    Compare per-call time of angle() against the lookup table path
+    fast_angle(), on the simulated bus, sweeping angles so the register
+    shadow does not skip the writes
+
+    :param iterations: number of calls per path
+    :type iterations: int
+    """
+    import time
+    servo = Servo("P0")
+    angles = [-90 + (i * 0.7) % 180 for i in range(iterations)]
+    servo.build_lut()
+
+    for name, func in (("angle", servo.angle),
+                       ("fast_angle", servo.fast_angle),
+                       ("angle_to_pulse_width", servo.angle_to_pulse_width),
+                       ("angle_word", servo.angle_word)):
+        start = time.perf_counter()
+        for angle in angles:
+            func(angle)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>20}: {elapsed / iterations * 1e6:6.2f} us/call")
+
+    error = max(abs(servo.angle_word(angle) - servo.angle_to_pulse_width(angle))
+                for angle in angles)
+    print(f"max lookup table error: {error} register steps")
+
+
+if __name__ == '__main__':
+    benchmark()
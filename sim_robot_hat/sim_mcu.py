@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Simulated Robot HAT hardware
+
+A register level model of the Robot HAT MCU behind an SMBus like
+interface, and virtual GPIO pins, so the library runs without hardware.
+"""
+import threading
+import time
+
+SOUND_SPEED = 343.3
+"""Speed of sound(m/s), same as Ultrasonic.SOUND_SPEED"""
+
+
+class i2c_msg(object):
+    """
+    I2C message of a combined transaction, same interface as smbus2.i2c_msg
+    """
+
+    I2C_M_RD = 0x0001
+
+    def __init__(self, addr, flags, buf):
+        self.addr = addr
+        self.flags = flags
+        self.buf = bytearray(buf)
+        self.len = len(self.buf)
+
+    @classmethod
+    def write(cls, address, buf):
+        """Message writing buf to address"""
+        return cls(address, 0, buf)
+
+    @classmethod
+    def read(cls, address, length):
+        """Message reading length bytes from address"""
+        return cls(address, cls.I2C_M_RD, bytes(length))
+
+    def __iter__(self):
+        return iter(self.buf)
+
+    def __len__(self):
+        return self.len
+
+    def __bytes__(self):
+        return bytes(self.buf)
+
+
+class SimMCU(object):
+    """
+    Register level model of the Robot HAT MCU
+
+    Registers are written as [reg, high byte, low byte], block writes
+    continue to the following registers. ADC conversion is started by
+    writing [0x10 | (7 - channel), 0, 0], the next two bytes read are
+    the value, high byte first.
+    """
+
+    ADDRESS = 0x14
+    """I2C address of the MCU"""
+    FIRMWARE_VERSION = (1, 0, 0)
+    """Firmware version returned by the version register"""
+
+    REG_VERSION = 0x05
+    REG_ADC = 0x10
+    REG_CHN = 0x20
+    REG_PSC = 0x40
+    REG_ARR = 0x44
+    REG_PSC2 = 0x50
+    REG_ARR2 = 0x54
+
+    CHANNELS = 20
+    """Number of PWM channels"""
+    TIMERS = 7
+    """Number of PWM timers"""
+
+    ADC_DEFAULT = [2000, 2000, 2000, 0, 3064, 0, 0, 0]
+    """ADC values after reset, grayscale A0-A2 on grey floor, A4 battery at 7.4V"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.adc_values = list(self.ADC_DEFAULT)
+        """ADC channel values(0-4095) of A0-A7, set to simulate sensors"""
+        self.reset()
+
+    def reset(self):
+        """Reset registers to power on state, ADC values are kept"""
+        with self._lock:
+            self.pulse_widths = [0] * self.CHANNELS
+            self.prescalers = [0] * self.TIMERS
+            self.periods = [0] * self.TIMERS
+            self._read_buffer = b''
+            self.register_writes = 0
+
+    def _write_reg(self, reg, value):
+        if self.REG_CHN <= reg < self.REG_CHN + self.CHANNELS:
+            self.pulse_widths[reg - self.REG_CHN] = value
+        elif self.REG_PSC <= reg < self.REG_PSC + 4:
+            self.prescalers[reg - self.REG_PSC] = value
+        elif self.REG_ARR <= reg < self.REG_ARR + 4:
+            self.periods[reg - self.REG_ARR] = value
+        elif self.REG_PSC2 <= reg < self.REG_PSC2 + 3:
+            self.prescalers[reg - self.REG_PSC2 + 4] = value
+        elif self.REG_ARR2 <= reg < self.REG_ARR2 + 3:
+            self.periods[reg - self.REG_ARR2 + 4] = value
+        else:
+            raise OSError(121, f"Remote I/O error, unknown register 0x{reg:02X}")
+        self.register_writes += 1
+
+    def write(self, data):
+        """
+        Handle bytes written by the host in one transaction
+
+        :param data: bytes on the wire, register address first
+        :type data: bytes/list
+        """
+        with self._lock:
+            if not data:
+                return
+            reg = data[0]
+            if reg & 0xF8 == self.REG_ADC:
+                channel = 7 - (reg & 0x07)
+                value = self.adc_values[channel] & 0xFFFF
+                self._read_buffer = bytes((value >> 8, value & 0xFF))
+                return
+            if reg == self.REG_VERSION:
+                self._read_buffer = bytes(self.FIRMWARE_VERSION)
+                return
+            payload = data[1:]
+            if len(payload) == 1:
+                self._read_buffer = b''
+                return
+            for i in range(len(payload) // 2):
+                self._write_reg(reg + i, (payload[2*i] << 8) | payload[2*i + 1])
+
+    def read(self, length):
+        """
+        Handle bytes read by the host in one transaction
+
+        :param length: number of bytes
+        :type length: int
+        :return: bytes read, 0 after the read buffer is exhausted
+        :rtype: bytes
+        """
+        with self._lock:
+            data = self._read_buffer[:length]
+            self._read_buffer = self._read_buffer[length:]
+        return data + bytes(length - len(data))
+
+    def read_reg(self, reg, length):
+        """
+        Handle a register read, write register address then read
+
+        :param reg: register address
+        :type reg: int
+        :param length: number of bytes
+        :type length: int
+        :return: bytes read
+        :rtype: bytes
+        """
+        self.write([reg])
+        return self.read(length)
+
+    def pulse_width(self, channel):
+        """
+        Get pulse width register of a channel
+
+        :param channel: PWM channel(0-19)
+        :type channel: int
+        :return: pulse width
+        :rtype: int
+        """
+        return self.pulse_widths[channel]
+
+
+class SimBus(object):
+    """
+    Simulated I2C bus with the same methods as smbus2.SMBus
+
+    Devices are objects with write(data) and read(length), like SimMCU.
+    Accessing an address without device raises OSError, like a real bus.
+    """
+
+    _buses = {}
+    _buses_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, bus=1):
+        """
+        Get the simulated bus of a bus number, with a SimMCU on bus 1
+
+        :param bus: I2C bus number
+        :type bus: int
+        :return: simulated bus
+        :rtype: SimBus
+        """
+        sim_bus = cls._buses.get(bus)
+        if sim_bus is None:
+            with cls._buses_lock:
+                sim_bus = cls._buses.get(bus)
+                if sim_bus is None:
+                    sim_bus = cls(bus)
+                    if bus == 1:
+                        sim_bus.add_device(SimMCU.ADDRESS, SimMCU())
+                    cls._buses[bus] = sim_bus
+        return sim_bus
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.devices = {}
+        self.latency = 0.0
+        """Simulated duration of a transaction(s), busy waits to keep timing realistic"""
+        self.transactions = 0
+        """Number of bus transactions"""
+
+    def add_device(self, address, device):
+        """
+        Attach a device to the bus
+
+        :param address: I2C address
+        :type address: int
+        :param device: device model with write(data) and read(length)
+        """
+        self.devices[address] = device
+
+    def device(self, address):
+        """
+        Get the device on an address
+
+        :param address: I2C address
+        :type address: int
+        :return: device model
+        :raise OSError: if there is no device on the address
+        """
+        self.transactions += 1
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+        try:
+            return self.devices[address]
+        except KeyError:
+            raise OSError(121, "Remote I/O error") from None
+
+    def write_byte(self, i2c_addr, value):
+        self.device(i2c_addr).write([value])
+
+    def write_byte_data(self, i2c_addr, register, value):
+        self.device(i2c_addr).write([register, value])
+
+    def write_word_data(self, i2c_addr, register, value):
+        self.device(i2c_addr).write([register, value & 0xFF, value >> 8])
+
+    def write_i2c_block_data(self, i2c_addr, register, data):
+        self.device(i2c_addr).write([register] + list(data))
+
+    def read_byte(self, i2c_addr):
+        return self.device(i2c_addr).read(1)[0]
+
+    def read_byte_data(self, i2c_addr, register):
+        return self.device(i2c_addr).read_reg(register, 1)[0]
+
+    def read_word_data(self, i2c_addr, register):
+        data = self.device(i2c_addr).read_reg(register, 2)
+        return data[0] | (data[1] << 8)
+
+    def read_i2c_block_data(self, i2c_addr, register, length):
+        return list(self.device(i2c_addr).read_reg(register, length))
+
+    def i2c_rdwr(self, *i2c_msgs):
+        """
+        Combined transaction, messages are separated by repeated starts
+
+        :param i2c_msgs: messages, i2c_msg.write() or i2c_msg.read()
+        """
+        self.transactions += 1
+        for msg in i2c_msgs:
+            device = self.devices.get(msg.addr)
+            if device is None:
+                raise OSError(121, "Remote I/O error")
+            if msg.flags & i2c_msg.I2C_M_RD:
+                msg.buf[:] = device.read(msg.len)
+            else:
+                device.write(list(msg.buf))
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+    def close(self):
+        pass
+
+
+class SimUltrasonic(object):
+    """
+    Ultrasonic sensor model, echo goes high shortly after the trigger
+    pulse for the round trip time of the distance
+    """
+
+    ECHO_DELAY = 0.0002
+    """Delay between trigger falling edge and echo rising edge(s)"""
+
+    def __init__(self, trig, echo, distance=100.0):
+        """
+        :param trig: trigger BCM pin number
+        :type trig: int
+        :param echo: echo BCM pin number
+        :type echo: int
+        :param distance: distance to the obstacle(cm), negative for no echo
+        :type distance: float
+        """
+        self.trig = trig
+        self.echo = echo
+        self.distance = distance
+        self._echo_start = None
+        self._echo_end = None
+
+    def on_trigger(self, now, board=None):
+        """Start an echo, called on trigger falling edge"""
+        if self.distance < 0:
+            self._echo_start = None
+            return
+        during = self.distance / 100 * 2 / SOUND_SPEED
+        self._echo_start = now + self.ECHO_DELAY
+        self._echo_end = self._echo_start + during
+        if board is not None and board.watched(self.echo):
+            threading.Thread(target=self._fire_edges, daemon=True,
+                             args=(board, self._echo_start, self._echo_end)).start()
+
+    def _fire_edges(self, board, start, end):
+        _wait_until(start)
+        # Keep the pulse width exact even if this thread woke up late
+        end = time.perf_counter() + end - start
+        board.fire(self.echo, 1)
+        _wait_until(end)
+        board.fire(self.echo, 0)
+
+    def echo_level(self, now):
+        """Get echo level at a time"""
+        if self._echo_start is None:
+            return 0
+        return 1 if self._echo_start <= now < self._echo_end else 0
+
+
+def _wait_until(deadline):
+    """Sleep, then spin for the last 0.5ms, to wake up at a precise time"""
+    remaining = deadline - time.perf_counter() - 0.0005
+    if remaining > 0:
+        time.sleep(remaining)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SimBoard(object):
+    """Virtual GPIO pins of the Raspberry Pi"""
+
+    MCU_RESET_PIN = 5
+    """BCM pin of the MCU reset line"""
+
+    def __init__(self):
+        self.levels = {}
+        """Output level of each BCM pin"""
+        self.ultrasonics = {}
+        """Ultrasonic models, echo pin -> SimUltrasonic"""
+        self._trig_models = {}
+        self._watchers = {}
+        self.add_ultrasonic(SimUltrasonic(27, 22))
+
+    def add_ultrasonic(self, model):
+        """
+        Attach an ultrasonic sensor model
+
+        :param model: ultrasonic model
+        :type model: SimUltrasonic
+        """
+        self.ultrasonics[model.echo] = model
+        self._trig_models[model.trig] = model
+
+    def gpio(self, pin, mode=None, pull=None):
+        """
+        Get a virtual gpio device of a pin
+
+        :param pin: BCM pin number
+        :type pin: int
+        :return: gpio device
+        :rtype: SimGPIO
+        """
+        return SimGPIO(self, pin, pull)
+
+    def watch(self, gpio, enable=True):
+        """Add or remove a gpio device with edge callbacks"""
+        watchers = self._watchers.setdefault(gpio.pin, set())
+        if enable:
+            watchers.add(gpio)
+        else:
+            watchers.discard(gpio)
+
+    def watched(self, pin):
+        """Check if any gpio device has edge callbacks on a pin"""
+        return bool(self._watchers.get(pin))
+
+    def fire(self, pin, level):
+        """Call edge callbacks of a pin"""
+        for gpio in list(self._watchers.get(pin, ())):
+            callback = gpio.when_activated if level else gpio.when_deactivated
+            if callback is not None:
+                callback()
+
+    def set_level(self, pin, level):
+        """Drive a pin to a level"""
+        old = self.levels.get(pin, 0)
+        self.levels[pin] = level
+        if old != level and self.watched(pin):
+            self.fire(pin, level)
+        if pin == self.MCU_RESET_PIN:
+            # MCURST is active low, driving it low resets the MCU whatever
+            # its previous level, the line starts low before the first reset
+            if not level:
+                for sim_bus in list(SimBus._buses.values()):
+                    for device in sim_bus.devices.values():
+                        if isinstance(device, SimMCU):
+                            device.reset()
+        elif old and not level and pin in self._trig_models:
+            self._trig_models[pin].on_trigger(time.perf_counter(), self)
+
+    def get_level(self, pin, pull=None):
+        """Get the level of a pin"""
+        model = self.ultrasonics.get(pin)
+        if model is not None:
+            return model.echo_level(time.perf_counter())
+        return self.levels.get(pin, 1 if pull == 0x11 else 0)
+
+
+class SimGPIO(object):
+    """
+    Virtual gpio device, with the gpiozero device methods Pin uses
+
+    when_activated and when_deactivated are called on rising and falling
+    edges, like on gpiozero.DigitalInputDevice.
+    """
+
+    def __init__(self, board, pin, pull=None):
+        self._board = board
+        self.pin = pin
+        self._pull = pull
+        self.pin_factory = self
+        self._when_activated = None
+        self._when_deactivated = None
+
+    @property
+    def when_activated(self):
+        return self._when_activated
+
+    @when_activated.setter
+    def when_activated(self, callback):
+        self._when_activated = callback
+        self._update_watch()
+
+    @property
+    def when_deactivated(self):
+        return self._when_deactivated
+
+    @when_deactivated.setter
+    def when_deactivated(self, callback):
+        self._when_deactivated = callback
+        self._update_watch()
+
+    def _update_watch(self):
+        if self.pin is not None:
+            self._board.watch(self, self._when_activated is not None
+                              or self._when_deactivated is not None)
+
+    @property
+    def value(self):
+        return self._board.get_level(self.pin, self._pull)
+
+    def on(self):
+        self._board.set_level(self.pin, 1)
+
+    def off(self):
+        self._board.set_level(self.pin, 0)
+
+    def close(self):
+        if self.pin is not None:
+            self._board.watch(self, False)
+        self.pin = None
+
+
+board = SimBoard()
+"""The virtual board all Pin objects use"""
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+import struct
+import threading
+
+OP_WRITE_BYTE = 0x01
+OP_WRITE_BYTE_DATA = 0x02
+OP_WRITE_WORD_DATA = 0x03
+OP_WRITE_BLOCK_DATA = 0x04
+OP_READ_BYTE = 0x11
+OP_READ_BYTE_DATA = 0x12
+OP_READ_WORD_DATA = 0x13
+OP_READ_BLOCK_DATA = 0x14
+OP_READ = 0x15
+OP_WRITE_READ = 0x21
+OP_FAILED = 0x80
+"""Flag of a try that raised OSError"""
+
+OP_NAMES = {
+    OP_WRITE_BYTE: 'write_byte',
+    OP_WRITE_BYTE_DATA: 'write_byte_data',
+    OP_WRITE_WORD_DATA: 'write_word_data',
+    OP_WRITE_BLOCK_DATA: 'write_i2c_block_data',
+    OP_READ_BYTE: 'read_byte',
+    OP_READ_BYTE_DATA: 'read_byte_data',
+    OP_READ_WORD_DATA: 'read_word_data',
+    OP_READ_BLOCK_DATA: 'read_i2c_block_data',
+    OP_READ: 'i2c_rdwr_read',
+    OP_WRITE_READ: 'i2c_rdwr',
+}
+
+# I2C method name -> op
+_METHOD_OPS = {
+    '_write_byte': OP_WRITE_BYTE,
+    '_write_byte_data': OP_WRITE_BYTE_DATA,
+    '_write_word_data': OP_WRITE_WORD_DATA,
+    '_write_i2c_block_data': OP_WRITE_BLOCK_DATA,
+    '_read_byte': OP_READ_BYTE,
+    '_read_byte_data': OP_READ_BYTE_DATA,
+    '_read_word_data': OP_READ_WORD_DATA,
+    '_read_i2c_block_data': OP_READ_BLOCK_DATA,
+    '_read_block': OP_READ,
+    '_write_read': OP_WRITE_READ,
+}
+
+PAYLOAD_SIZE = 24
+"""Max payload bytes kept per record, longer payloads are truncated"""
+
+RECORD = struct.Struct(f'<dfBBBB{PAYLOAD_SIZE}s')
+"""Record: timestamp(s), latency(s), op, address, register, payload length, payload"""
+
+
+def encode_call(method, args, result):
+    """
+    Get op, register and payload bytes of an I2C method call
+
+    :param method: I2C method name, e.g. "_write_word_data"
+    :type method: str
+    :param args: method arguments
+    :type args: tuple
+    :param result: method return value
+    :return: (op, register, payload) or None if the method is not a bus transaction
+    :rtype: tuple/None
+    """
+    op = _METHOD_OPS.get(method)
+    if op is None:
+        return None
+    reg = 0
+    if op == OP_WRITE_BYTE:
+        payload = bytes((args[0] & 0xFF,))
+    elif op == OP_WRITE_BYTE_DATA:
+        reg = args[0]
+        payload = bytes((args[1] & 0xFF,))
+    elif op == OP_WRITE_WORD_DATA:
+        reg = args[0]
+        payload = bytes((args[1] & 0xFF, (args[1] >> 8) & 0xFF))
+    elif op == OP_WRITE_BLOCK_DATA:
+        reg = args[0]
+        payload = bytes(args[1])
+    elif op == OP_WRITE_READ:
+        # Payload: number of bytes written after the register, those
+        # bytes, then the bytes read
+        data = args[0]
+        reg = data[0] if data else 0
+        read = bytes(result) if result else bytes(args[1])
+        payload = bytes((len(data) - 1,)) + bytes(data[1:]) + read
+    elif result is None or result is False:
+        reg = args[0] if args and op != OP_READ else 0
+        payload = b''
+    elif op == OP_READ_BYTE:
+        payload = bytes((result,))
+    elif op == OP_READ:
+        payload = bytes(result)
+    else:
+        reg = args[0]
+        payload = bytes(result) if not isinstance(result, int) else bytes((result,))
+    return op, reg & 0xFF, payload
+
+
+class TraceBuffer(object):
+    """
+    Ring buffer of binary I2C trace records
+
+    The buffer is preallocated, recording packs one fixed size record in
+    place and never allocates, the oldest records are overwritten when full.
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        Initialize the trace buffer
+
+        :param capacity: number of records kept
+        :type capacity: int
+        """
+        self.capacity = capacity
+        self._buffer = bytearray(capacity * RECORD.size)
+        self._index = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def record(self, timestamp, latency, op, address, reg, payload):
+        """
+        Add a record
+
+        :param timestamp: transaction start, time.perf_counter()
+        :type timestamp: float
+        :param latency: transaction duration(s)
+        :type latency: float
+        :param op: trace op, e.g. OP_WRITE_WORD_DATA
+        :type op: int
+        :param address: I2C device address
+        :type address: int
+        :param reg: register address
+        :type reg: int
+        :param payload: data written or read
+        :type payload: bytes
+        """
+        with self._lock:
+            RECORD.pack_into(self._buffer, self._index * RECORD.size,
+                             timestamp, latency, op, address or 0, reg,
+                             min(len(payload), 0xFF), payload)
+            self._index = (self._index + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def record_call(self, method, address, args, result, timestamp, latency, failed=False):
+        """
+        Add a record of an I2C method call, see encode_call()
+
+        :param failed: the call raised OSError
+        :type failed: bool
+        """
+        encoded = encode_call(method, args, result)
+        if encoded is None:
+            return
+        op, reg, payload = encoded
+        if failed:
+            op |= OP_FAILED
+        self.record(timestamp, latency, op, address, reg, payload)
+
+    def raw(self):
+        """
+        Get records as bytes, oldest first
+
+        :return: packed records
+        :rtype: bytes
+        """
+        with self._lock:
+            if self._count < self.capacity:
+                return bytes(self._buffer[:self._count * RECORD.size])
+            split = self._index * RECORD.size
+            return bytes(self._buffer[split:] + self._buffer[:split])
+
+    def records(self):
+        """
+        Get decoded records, oldest first
+
+        :return: list of (timestamp, latency, op, address, register, payload)
+        :rtype: list
+        """
+        return list(iter_records(self.raw()))
+
+    def clear(self):
+        """Drop all records"""
+        with self._lock:
+            self._index = 0
+            self._count = 0
+
+
+def iter_records(data):
+    """
+    Decode packed records
+
+    :param data: packed records
+    :type data: bytes/memoryview
+    :return: iterator of (timestamp, latency, op, address, register, payload)
+    """
+    for timestamp, latency, op, address, reg, length, payload in RECORD.iter_unpack(data):
+        yield timestamp, latency, op, address, reg, payload[:min(length, PAYLOAD_SIZE)]
+
+
+MAGIC = b'RHTRACE1'
+"""Header of trace log files"""
+
+
+class TraceRecorder(object):
+    """
+    Append only binary log of I2C transactions
+
+    Records are packed into a preallocated chunk, full chunks are written
+    to the file by a background thread, so recording costs the same as
+    TraceBuffer and never waits for the disk. Use as I2C tracer:
+
+        recorder = TraceRecorder('run.trace')
+        I2C.enable_trace(recorder)
+        ...
+        I2C.disable_trace()
+        recorder.close()
+    """
+
+    def __init__(self, path, chunk_records=4096):
+        """
+        Initialize the recorder
+
+        :param path: log file path, records are appended if it exists
+        :type path: str
+        :param chunk_records: number of records per chunk written to the file
+        :type chunk_records: int
+        """
+        import os
+        import queue
+        self.path = path
+        self.chunk_records = chunk_records
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new_file:
+            self._file.write(MAGIC)
+        self._chunk = bytearray(chunk_records * RECORD.size)
+        self._index = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self.records = 0
+        """Number of records recorded"""
+
+    def _write_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            self._file.write(chunk)
+        self._file.flush()
+
+    def record(self, timestamp, latency, op, address, reg, payload):
+        """Add a record, see TraceBuffer.record()"""
+        with self._lock:
+            RECORD.pack_into(self._chunk, self._index * RECORD.size,
+                             timestamp, latency, op, address or 0, reg,
+                             min(len(payload), 0xFF), payload)
+            self._index += 1
+            self.records += 1
+            if self._index == self.chunk_records:
+                self._queue.put(self._chunk)
+                self._chunk = bytearray(self.chunk_records * RECORD.size)
+                self._index = 0
+
+    record_call = TraceBuffer.record_call
+
+    def flush(self):
+        """Hand the current partial chunk to the writer"""
+        with self._lock:
+            if self._index:
+                self._queue.put(bytes(self._chunk[:self._index * RECORD.size]))
+                self._index = 0
+
+    def close(self):
+        """Write all records and close the file"""
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+
+def read_log(path):
+    """
+    Read records of a trace log file
+
+    :param path: log file path
+    :type path: str
+    :return: list of (timestamp, latency, op, address, register, payload)
+    :rtype: list
+    :raise ValueError: if the file is not a trace log
+    """
+    import mmap
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'"{path}" is not an I2C trace log')
+        size = f.seek(0, 2)
+        if size == len(MAGIC):
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            end = len(MAGIC) + (size - len(MAGIC)) // RECORD.size * RECORD.size
+            return list(iter_records(m[len(MAGIC):end]))
+
+
+def summarize(records):
+    """
+    Summarize bus usage of trace records
+
+    :param records: records, from read_log() or TraceBuffer.records()
+    :type records: list
+    :return: dict of count, failed, duration(s), busy(s), utilization(0-1) and
+             registers: {(address, register): {count, bytes, busy, max_latency, ops}}
+    :rtype: dict
+    """
+    registers = {}
+    busy = 0.0
+    failed = 0
+    for timestamp, latency, op, address, reg, payload in records:
+        busy += latency
+        if op & OP_FAILED:
+            failed += 1
+        key = (address, reg)
+        stats = registers.get(key)
+        if stats is None:
+            stats = registers[key] = {'count': 0, 'bytes': 0, 'busy': 0.0,
+                                      'max_latency': 0.0, 'ops': set()}
+        stats['count'] += 1
+        stats['bytes'] += len(payload)
+        stats['busy'] += latency
+        stats['max_latency'] = max(stats['max_latency'], latency)
+        stats['ops'].add(OP_NAMES.get(op & ~OP_FAILED, hex(op)))
+    if records:
+        duration = records[-1][0] + records[-1][1] - records[0][0]
+    else:
+        duration = 0.0
+    return {
+        'count': len(records),
+        'failed': failed,
+        'duration': duration,
+        'busy': busy,
+        'utilization': busy / duration if duration > 0 else 0.0,
+        'registers': registers,
+    }
+
+
+def replay(records, bus=None, realtime=False):
+    """
+    Replay trace records against the simulated hardware
+
+    Writes are applied to the simulated devices, reads are done and
+    compared with the recorded data. Failed tries are skipped.
+
+    :param records: records, from read_log() or TraceBuffer.records()
+    :type records: list
+    :param bus: simulated bus, default SimBus.get(1)
+    :type bus: sim_robot_hat.sim_mcu.SimBus
+    :param realtime: keep the recorded time between transactions
+    :type realtime: bool
+    :return: dict of count, mismatches(reads that differ from the record) and errors
+    :rtype: dict
+    """
+    import time
+    from .sim_mcu import SimBus
+    if bus is None:
+        bus = SimBus.get(1)
+    count = mismatches = errors = 0
+    start = time.perf_counter()
+    first = records[0][0] if records else 0.0
+    for timestamp, latency, op, address, reg, payload in records:
+        if op & OP_FAILED:
+            continue
+        if realtime:
+            delay = timestamp - first - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        count += 1
+        try:
+            device = bus.device(address)
+            if op == OP_WRITE_BYTE:
+                device.write(list(payload))
+            elif op < OP_READ_BYTE:
+                device.write([reg] + list(payload))
+            elif op in (OP_READ_BYTE, OP_READ):
+                if device.read(len(payload)) != payload:
+                    mismatches += 1
+            elif op == OP_WRITE_READ:
+                split = payload[0] + 1
+                device.write([reg] + list(payload[1:split]))
+                if device.read(len(payload) - split) != payload[split:]:
+                    mismatches += 1
+            elif device.read_reg(reg, len(payload)) != payload:
+                mismatches += 1
+        except OSError:
+            errors += 1
+    return {'count': count, 'mismatches': mismatches, 'errors': errors}
+
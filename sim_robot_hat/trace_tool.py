@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Command line tool of I2C trace logs recorded with trace.TraceRecorder
+
+    python -m sim_robot_hat.trace_tool summary run.trace
+    python -m sim_robot_hat.trace_tool replay run.trace --realtime
+"""
+from .trace import read_log, replay, summarize
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m sim_robot_hat.trace_tool',
+        description='Inspect and replay I2C trace logs')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('summary', help='bus utilization per register')
+    p.add_argument('log')
+    p = sub.add_parser('replay', help='replay against the simulated MCU')
+    p.add_argument('log')
+    p.add_argument('--realtime', action='store_true',
+                   help='keep the recorded timing')
+    args = parser.parse_args(argv)
+
+    records = read_log(args.log)
+    if args.command == 'summary':
+        summary = summarize(records)
+        print(f"transactions: {summary['count']}, failed: {summary['failed']}")
+        print(f"duration: {summary['duration']*1000:.3f} ms, "
+              f"busy: {summary['busy']*1000:.3f} ms, "
+              f"utilization: {summary['utilization']*100:.2f}%")
+        print(f"{'addr':>6} {'reg':>6} {'count':>8} {'bytes':>8} "
+              f"{'busy ms':>10} {'max us':>9}  ops")
+        registers = summary['registers']
+        for key in sorted(registers, key=lambda k: -registers[k]['busy']):
+            address, reg = key
+            stats = registers[key]
+            print(f"  0x{address:02X}   0x{reg:02X} {stats['count']:>8} "
+                  f"{stats['bytes']:>8} {stats['busy']*1000:>10.3f} "
+                  f"{stats['max_latency']*1e6:>9.1f}  {','.join(sorted(stats['ops']))}")
+    elif args.command == 'replay':
+        result = replay(records, realtime=args.realtime)
+        print(f"replayed: {result['count']}, mismatches: {result['mismatches']}, "
+              f"errors: {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import time
+from .utils import _import_numpy
+
+PROFILES = ('linear', 'ease', 'trapezoid')
+"""Names of the supported motion profiles"""
+
+TRAPEZOID_ACCEL = 0.25
+"""Fraction of the move spent accelerating, and again decelerating, in the trapezoid profile"""
+
+
+def peak_velocity_factor(profile):
+    """
+    Get the ratio of peak to average velocity of a profile, used to stretch
+    a move so its fastest step stays under a velocity limit
+
+    :param profile: profile name, one of PROFILES
+    :type profile: str
+    :return: peak velocity / average velocity
+    :rtype: float
+    """
+    if profile == 'linear':
+        return 1.0
+    elif profile == 'ease':
+        return 1.5707963267948966  # pi / 2
+    elif profile == 'trapezoid':
+        return 1 / (1 - TRAPEZOID_ACCEL)
+    raise ValueError(f"Unknown profile: {profile}, use one of {PROFILES}")
+
+
+def progress(profile, steps):
+    """
+    Get the normalized progress of a move at the end of each step
+
+    :param profile: 'linear' for constant velocity, 'ease' for cosine ease
+                    in/out, 'trapezoid' for constant acceleration, cruise, and
+                    constant deceleration
+    :type profile: str
+    :param steps: number of steps
+    :type steps: int
+    :return: array of steps values rising to 1.0
+    :rtype: numpy.ndarray
+    """
+    np = _import_numpy()
+    t = np.arange(1, steps + 1) / steps
+    if profile == 'linear':
+        return t
+    elif profile == 'ease':
+        return (1 - np.cos(np.pi * t)) / 2
+    elif profile == 'trapezoid':
+        a = TRAPEZOID_ACCEL
+        v = 1 / (1 - a)
+        return np.where(t < a, v * t * t / (2 * a),
+                        np.where(t > 1 - a, 1 - v * (1 - t) ** 2 / (2 * a),
+                                 v * (t - a / 2)))
+    raise ValueError(f"Unknown profile: {profile}, use one of {PROFILES}")
+
+
+def plan(start, targets, steps, profile='linear'):
+    """
+    Precompute the angles of every servo at every step of a move
+
+    :param start: current angles
+    :type start: list
+    :param targets: target angles
+    :type targets: list
+    :param steps: number of steps
+    :type steps: int
+    :param profile: profile name, one of PROFILES
+    :type profile: str
+    :return: steps x servos array of angles, the last row is targets
+    :rtype: numpy.ndarray
+    """
+    np = _import_numpy()
+    start = np.asarray(start, dtype=float)
+    delta = np.asarray(targets, dtype=float) - start
+    return start + np.outer(progress(profile, steps), delta)
+
+
+class TrajectoryWriter(object):
+    """
+    Stream a precomputed trajectory to servos
+
+    Angles are turned into register words for all steps at once through
+    the servo lookup tables, then each row is sent as one batched PWM
+    write at an absolute deadline, so slow steps do not add up to drift.
+    """
+
+    def __init__(self, servos, step_time=0.01):
+        """
+        Initialize the writer
+
+        :param servos: servos to drive, all on one device
+        :type servos: list
+        :param step_time: time between rows(s)
+        :type step_time: float
+        """
+        self.servos = list(servos)
+        self.step_time = step_time
+        self.late_steps = 0
+        """Number of rows written after their deadline"""
+
+    def words(self, angles, offsets=None, directions=None):
+        """
+        Convert a trajectory to pulse width register words
+
+        :param angles: steps x servos array of angles
+        :type angles: numpy.ndarray
+        :param offsets: calibration offset of each servo
+        :type offsets: list
+        :param directions: direction(1/-1) of each servo
+        :type directions: list
+        :return: steps x servos array of register words
+        :rtype: numpy.ndarray
+        """
+        np = _import_numpy()
+        angles = np.asarray(angles, dtype=float)
+        words = np.empty(angles.shape, dtype=np.int64)
+        for i, servo in enumerate(self.servos):
+            offset = 0 if offsets is None else offsets[i]
+            direction = 1 if directions is None else directions[i]
+            words[:, i] = servo.angle_words(angles[:, i], offset, direction)
+        return words
+
+    def play(self, words, on_step=None):
+        """
+        Write the rows of a trajectory, one every step_time, blocking until done
+
+        :param words: steps x servos array of register words
+        :type words: numpy.ndarray
+        :param on_step: called with the row index after each row is written, return True to stop early
+        :type on_step: callable
+        :return: number of rows written
+        :rtype: int
+        """
+        writer = self.servos[0]
+        servos = self.servos
+        rows = words.tolist()
+        deadline = time.monotonic()
+        for index, row in enumerate(rows):
+            writer.write_many(dict(zip(servos, row)))
+            if on_step is not None and on_step(index):
+                return index + 1
+            deadline += self.step_time
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.late_steps += 1
+        return len(rows)
+
+
+class Timeline(object):
+    """
+    Packed timeline of register writes
+
+    Events are prepared ahead as (time, pulse widths, pin levels) tuples,
+    so playback is a tight loop of sleeps to absolute deadlines and one
+    batched PWM write per event.
+    """
+
+    def __init__(self, writer, events, duration):
+        """
+        Initialize the timeline
+
+        :param writer: PWM device to write through
+        :type writer: PWM
+        :param events: list of (time from start(s), {PWM: pulse width}, ((Pin, level), ...)), sorted by time
+        :type events: list
+        :param duration: length of the timeline(s), play() returns at this time after start
+        :type duration: float
+        """
+        self.writer = writer
+        self.events = events
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.events)
+
+    def play(self):
+        """Play the timeline, blocking until its end"""
+        write_many = self.writer.write_many
+        monotonic = time.monotonic
+        sleep = time.sleep
+        start = monotonic()
+        for at, pulse_widths, levels in self.events:
+            delay = start + at - monotonic()
+            if delay > 0:
+                sleep(delay)
+            for pin, level in levels:
+                pin.value(level)
+            if pulse_widths:
+                write_many(pulse_widths)
+        delay = start + self.duration - monotonic()
+        if delay > 0:
+            sleep(delay)
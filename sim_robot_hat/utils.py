@@ -108,7 +108,12 @@ def reset_mcu():
     This is helpful if the mcu somehow stuck in a I2C data
     transfer loop, and Raspberry Pi getting IOError while
     Reading ADC, manipulating PWM, etc.
+
+    All I2C register shadows are marked stale, as the mcu
+    registers lose their values on reset, call resync_shadow()
+    of a device to write its last values back.
     """
+    from .i2c import I2C
     mcu_reset = Pin("MCURST")
     mcu_reset.off()
     time.sleep(0.01)
@@ -116,6 +121,7 @@ def reset_mcu():
     time.sleep(0.01)
 
     mcu_reset.close()
+    I2C.mark_all_stale()
 
 
 def get_battery_voltage():
@@ -130,3 +136,12 @@ def get_battery_voltage():
     raw_voltage = adc.read_voltage()
     voltage = raw_voltage * 3
     return voltage
+
+
+def _import_numpy():
+    # numpy is optional, import it only where batch features need it
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required, install it with: pip install numpy") from None
+    return numpy